@@ -0,0 +1,122 @@
+"""Micro-benchmark de búsqueda de palabras clave.
+
+Compara el is_relevant original (un `in` por palabra clave) con
+radar_keywords.KeywordMatcher y verifica que den el mismo puntaje. Con
+--engines se fuerzan los tres recorridos (`str.find`, pyahocorasick si está
+instalado y el autómata en Python puro) sin importar la cantidad de palabras.
+
+Uso:
+    python3 bench_keywords.py                      # 1000 palabras, 10 MB sintéticos
+    python3 bench_keywords.py --keywords 3 --corpus-mb 0.011 --repeat 200
+    python3 bench_keywords.py --corpus textos.txt --keywords-file keywords.json
+"""
+import argparse
+import json
+import random
+import string
+import time
+
+import radar_keywords
+from radar_keywords import KeywordMatcher
+
+def naive_is_relevant(keywords, text, title=""):
+    """Implementación original de is_relevant."""
+    score = 0
+    text_lower = (text + " " + title).lower()
+    for keyword in keywords:
+        if keyword.lower() in text_lower:
+            score += 1
+    return score > 0, score
+
+def synthetic_keywords(count, vocabulary):
+    keywords = set()
+    while len(keywords) < count:
+        keywords.add(' '.join(random.choices(vocabulary, k=random.randint(1, 2))).title())
+    return sorted(keywords)
+
+def synthetic_corpus(size, vocabulary):
+    words = []
+    length = 0
+    while length < size:
+        word = random.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+def timed(repeat, function, *args):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+def forced_matcher(keywords, engine, **options):
+    """KeywordMatcher con el recorrido `engine` sin importar los límites."""
+    limits = radar_keywords.SUBSTRING_LIMIT, radar_keywords.PYTHON_AUTOMATON_LIMIT, radar_keywords.ahocorasick
+    if engine == 'substring':
+        radar_keywords.SUBSTRING_LIMIT = radar_keywords.PYTHON_AUTOMATON_LIMIT = len(keywords)
+    else:
+        radar_keywords.SUBSTRING_LIMIT = radar_keywords.PYTHON_AUTOMATON_LIMIT = 0
+        if engine == 'python':
+            radar_keywords.ahocorasick = None
+    try:
+        return KeywordMatcher(keywords, **options)
+    finally:
+        radar_keywords.SUBSTRING_LIMIT, radar_keywords.PYTHON_AUTOMATON_LIMIT, radar_keywords.ahocorasick = limits
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de is_relevant')
+    parser.add_argument('--keywords', type=int, default=1000, help='Cantidad de palabras clave sintéticas')
+    parser.add_argument('--keywords-file', type=str, help='Archivo JSON con palabras clave')
+    parser.add_argument('--corpus', type=str, help='Archivo de texto a recorrer')
+    parser.add_argument('--corpus-mb', type=float, default=10, help='Tamaño del corpus sintético (MB)')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones de cada búsqueda (se informa el promedio)')
+    parser.add_argument('--engines', action='store_true', help='Medir también cada recorrido forzado')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    vocabulary = [''.join(random.choices(string.ascii_lowercase + 'áéíóúñ', k=random.randint(3, 10)))
+                  for _ in range(20000)]
+    if args.keywords_file:
+        with open(args.keywords_file, 'r', encoding='utf-8') as f:
+            keywords = json.load(f)
+    else:
+        keywords = synthetic_keywords(args.keywords, vocabulary)
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = synthetic_corpus(int(args.corpus_mb * 1024 * 1024), vocabulary)
+
+    print(f"{len(keywords)} palabras clave, {len(text) / 1024:.0f} KB de texto, pyahocorasick "
+          f"{'instalado' if radar_keywords.ahocorasick else 'no instalado'}")
+
+    (_, naive_score), naive_time = timed(args.repeat, naive_is_relevant, keywords, text)
+    print(f"in por palabra clave:     {naive_time * 1000:9.3f} ms  puntaje={naive_score}")
+
+    matcher, build_time = timed(1, KeywordMatcher, keywords)
+    (_, score, _), scan_time = timed(args.repeat, matcher.match, text)
+    print(f"KeywordMatcher ({matcher.engine}):".ljust(26) + f"{scan_time * 1000:9.3f} ms  puntaje={score}  armado {build_time * 1000:.1f} ms")
+    if score != naive_score:
+        print("  ¡el puntaje no coincide con el original!")
+
+    if args.engines:
+        engines = ['substring', 'python'] + (['pyahocorasick'] if radar_keywords.ahocorasick else [])
+        for engine in engines:
+            forced = forced_matcher(keywords, engine)
+            (_, forced_score, _), forced_time = timed(args.repeat, forced.match, text)
+            print(f"  forzado {engine}:".ljust(26) + f"{forced_time * 1000:9.3f} ms  puntaje={forced_score}")
+
+    folded = KeywordMatcher(keywords, fold_accents=True)
+    (_, folded_score, _), folded_scan = timed(args.repeat, folded.match, text)
+    print(f"sin tildes:               {folded_scan * 1000:9.3f} ms  puntaje={folded_score}")
+
+    bounded = KeywordMatcher(keywords, word_boundary=True)
+    (_, bounded_score, _), bounded_scan = timed(args.repeat, bounded.match, text)
+    print(f"palabras completas:       {bounded_scan * 1000:9.3f} ms  puntaje={bounded_score}")
+
+    if naive_time and scan_time:
+        print(f"Aceleración: {naive_time / scan_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark de los radares contra una corrida grabada.
+
+Levanta radar_replay.ReplayServer con el archivo WARC (mismas condiciones de
+red para todos) y corre cada radar como subproceso, en un directorio
+temporal propio para que no comparta cachés ni URLs vistas. Por radar
+informa:
+
+- artículos/s: artículos servidos por el replay / duración de la corrida
+- p50/p95 de latencia de fetch, medida en el servidor (llegada del pedido
+  hasta el último byte, con la latencia y el ancho de banda simulados)
+- tiempo de CPU (usuario + sistema, incluidos los procesos de parseo) y
+  RSS máximo, tomados de wait4
+
+Uso:
+    python3 radar_optimo.py --sources-file sources.json --keywords-file keywords.json --record crawl.warc.gz
+    python3 bench_radar.py crawl.warc.gz --keywords-file keywords.json --latency-ms 80 --jitter-ms 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from radar_replay import add_replay_arguments, replay_server_from_args
+
+ENGINES = ['radar_optimo.py', 'radar.py', 'radar_grok.py']
+# Radares que entienden fuentes con ajustes por dominio ({"url": ..., "rate": ...})
+DICT_SOURCE_ENGINES = {'radar_optimo.py'}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class ReplayThread:
+    """ReplayServer en un hilo con su propio loop: el hilo principal queda libre
+    para esperar a los subprocesos con os.wait4."""
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def __enter__(self):
+        self.thread.start()
+        self.call(self.server.start())
+        return self
+
+    def __exit__(self, *exc_info):
+        self.call(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+def local_sources(server, sources):
+    """Fuentes con las URLs reemplazadas por las del replay (ajustes por dominio incluidos)."""
+    if not sources:
+        return server.homepages()
+    mapped = []
+    for source in sources:
+        if isinstance(source, dict):
+            url = server.local_url(source['url'])
+            if url:
+                mapped.append({**source, 'url': url})
+        else:
+            url = server.local_url(source)
+            if url:
+                mapped.append(url)
+    return mapped
+
+def engine_sources(engine, sources):
+    """Fuentes para un radar: radar.py y radar_grok.py solo aceptan URLs, así
+    que a ellos se les pasan sin los ajustes por dominio."""
+    if os.path.basename(engine) in DICT_SOURCE_ENGINES:
+        return sources
+    return [source['url'] if isinstance(source, dict) else source for source in sources]
+
+def run_engine(engine, argv, workdir):
+    """Corre un radar y devuelve (código, segundos, rusage)."""
+    log = open(os.path.join(workdir, 'engine.log'), 'wb')
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, engine)] + argv, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.monotonic() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    log.close()
+    return process.returncode, elapsed, usage
+
+def tail(path, lines=5):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de los radares contra una corrida grabada')
+    add_replay_arguments(parser)
+    parser.add_argument('--engines', nargs='+', default=ENGINES, help='Scripts a comparar')
+    parser.add_argument('--keywords', type=str, help='Lista de palabras clave (JSON)')
+    parser.add_argument('--keywords-file', type=str, help='Archivo JSON con palabras clave')
+    parser.add_argument('--sources-file', type=str, help='Fuentes grabadas (por defecto, las portadas del archivo)')
+    parser.add_argument('--json', type=str, help='Guardar también los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    if args.keywords_file:
+        with open(args.keywords_file, 'r', encoding='utf-8') as f:
+            keywords = json.load(f)
+    else:
+        keywords = json.loads(args.keywords or '[]')
+    sources = None
+    if args.sources_file:
+        with open(args.sources_file, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+
+    server = replay_server_from_args(args)
+    report = []
+    with ReplayThread(server):
+        sources = local_sources(server, sources)
+        print(f"{sum(len(paths) for paths in server.responses.values())} respuestas grabadas de {len(server.responses)} dominios")
+        print(f"{'radar':<18} {'art/s':>7} {'artículos':>9} {'pedidos':>8} {'429':>5} {'404':>5} {'p50 ms':>8} {'p95 ms':>8} {'CPU s':>7} {'RSS MB':>7} {'total s':>8}")
+        for engine in args.engines:
+            server.reset_stats()
+            with tempfile.TemporaryDirectory(prefix='bench_radar_') as workdir:
+                argv = ['--keywords', json.dumps(keywords), '--sources', json.dumps(engine_sources(engine, sources)), '--output', 'salida.csv']
+                code, elapsed, usage = run_engine(engine, argv, workdir)
+                if code != 0:
+                    print(f"{engine:<18} falló (código {code}):\n{tail(os.path.join(workdir, 'engine.log'))}")
+                    report.append({"engine": engine, "exit_code": code})
+                    continue
+            stats = server.stats.summary()
+            row = {
+                "engine": engine,
+                "seconds": elapsed,
+                "articles_per_second": stats['articles'] / elapsed,
+                "cpu_seconds": usage.ru_utime + usage.ru_stime,
+                "peak_rss_mb": usage.ru_maxrss / 1024,
+                **stats,
+            }
+            report.append(row)
+            print(
+                f"{engine:<18} {row['articles_per_second']:7.2f} {row['articles']:9d} {row['requests']:8d} "
+                f"{row['throttled']:5d} {row['missing']:5d} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['cpu_seconds']:7.2f} "
+                f"{row['peak_rss_mb']:7.1f} {elapsed:8.2f}"
+            )
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark de is_article_url.
+
+Compara la versión original (listas de patrones recorridas con re.search) con
+UrlClassifier de radar_urls.py, con y sin memo, y verifica que las dos
+clasifiquen igual.
+
+Uso:
+    python3 bench_urls.py --links enlaces.txt      # una URL por línea
+    python3 bench_urls.py                          # 100k enlaces armados a partir de los CSV/JSON del servidor
+"""
+import argparse
+import glob
+import random
+import re
+import time
+from urllib.parse import urlparse
+
+from radar_urls import ARTICLE_PATTERNS, NON_ARTICLE_PATTERNS, UrlClassifier
+
+def original_is_article_url(url):
+    """Implementación original de is_article_url."""
+    article_patterns = list(ARTICLE_PATTERNS)
+    non_article_patterns = list(NON_ARTICLE_PATTERNS)
+    parsed_url = urlparse(url)
+    return (
+        parsed_url.scheme in ['http', 'https'] and
+        any(re.search(pattern, parsed_url.path, re.IGNORECASE) for pattern in article_patterns) and
+        not any(re.search(pattern, url, re.IGNORECASE) for pattern in non_article_patterns)
+    )
+
+def recorded_links():
+    """URLs reales guardadas en los resultados del servidor."""
+    links = set()
+    for path in glob.glob('*.csv') + glob.glob('*.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            links.update(re.findall(r'https?://[^\s",<>]+', f.read()))
+    return sorted(links)
+
+def expand_links(seeds, count):
+    """Arma `count` enlaces variando los reales como aparecen en una portada:
+    secciones, etiquetas, redes sociales, parámetros y repeticiones."""
+    extras = ['', '/', '?utm_source=twitter', '#comentarios', '/amp']
+    noise = [
+        '/tag/{}', '/category/{}', '/search/?q={}', '/login/', '/{}.pdf',
+        'https://twitter.com/{}', 'https://www.facebook.com/{}', 'https://wa.me/?text={}'
+    ]
+    links = []
+    while len(links) < count:
+        seed = random.choice(seeds)
+        roll = random.random()
+        if roll < 0.5:
+            links.append(seed)  # los mismos enlaces se repiten entre portada y secciones
+        elif roll < 0.8:
+            links.append(seed.rstrip('/') + random.choice(extras))
+        else:
+            parsed = urlparse(seed)
+            slug = parsed.path.strip('/').split('/')[-1] or 'inicio'
+            template = random.choice(noise).format(slug)
+            links.append(template if template.startswith('http') else f"{parsed.scheme}://{parsed.netloc}{template}")
+    return links
+
+def timed(function, links):
+    start = time.perf_counter()
+    results = [function(link) for link in links]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de is_article_url')
+    parser.add_argument('--links', type=str, help='Archivo con una URL por línea')
+    parser.add_argument('--count', type=int, default=100000, help='Cantidad de enlaces si no se pasa --links')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.links:
+        with open(args.links, 'r', encoding='utf-8') as f:
+            links = [line.strip() for line in f if line.strip()]
+    else:
+        links = expand_links(recorded_links(), args.count)
+    print(f"{len(links)} enlaces ({len(set(links))} distintos)")
+
+    expected, original_time = timed(original_is_article_url, links)
+    print(f"original (re.search por patrón): {original_time:6.3f} s")
+
+    classifier = UrlClassifier()
+    compiled, compiled_time = timed(lambda url: classifier.is_article(urlparse(url), url), links)
+    print(f"alternancias precompiladas:      {compiled_time:6.3f} s")
+
+    memo = {}
+
+    def memoized(url):
+        result = memo.get(url)
+        if result is None:
+            result = memo[url] = classifier.is_article(urlparse(url), url)
+        return result
+
+    cached, cached_time = timed(memoized, links)
+    print(f"precompiladas + memo:            {cached_time:6.3f} s")
+
+    mismatches = sum(1 for a, b, c in zip(expected, compiled, cached) if not a == b == c)
+    print(f"Diferencias de clasificación: {mismatches}")
+    print(f"Aceleración: {original_time / compiled_time:.1f}x sin memo, {original_time / cached_time:.1f}x con memo")
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,197 @@ app.use(express.json());
 // Store running processes
 const runningProcesses = new Map();
 
+// Líneas de salida que se conservan por proceso: el log completo queda en
+// radar_optimo_v4.log; en memoria solo lo último, para el endpoint de estado.
+const MAX_OUTPUT_LINES = 500;
+
+function pushOutput(processInfo, line) {
+  processInfo.output.push(line);
+  if (processInfo.output.length > MAX_OUTPUT_LINES) {
+    processInfo.output.splice(0, processInfo.output.length - MAX_OUTPUT_LINES);
+  }
+}
+
+// Daemon de radar_optimo.py (--daemon): un proceso de larga vida por ejecutable
+// de Python que recibe trabajos JSON por stdin y responde eventos por stdout,
+// así cada ejecución se ahorra el arranque del intérprete, los imports y el
+// pool de conexiones en frío. RADAR_DAEMON=0 vuelve a un proceso por corrida.
+const USE_RADAR_DAEMON = process.env.RADAR_DAEMON !== '0';
+// Un trabajo que no termina en este tiempo se da por colgado: se mata el
+// daemon (que corre los trabajos de a uno) y los que esperaban pasan a uno nuevo.
+const RADAR_JOB_TIMEOUT_MS = parseInt(process.env.RADAR_JOB_TIMEOUT_MS || String(30 * 60 * 1000), 10);
+const radarDaemons = new Map();
+// Trabajos del daemon por id ("job-1", "job-2", ...), aparte de runningProcesses
+// (que guarda PIDs del sistema) para que un id de trabajo no se confunda con un PID.
+const radarJobs = new Map();
+let nextJobId = 1;
+
+function getRadarDaemon(pythonCommand) {
+  if (radarDaemons.has(pythonCommand)) {
+    return radarDaemons.get(pythonCommand);
+  }
+  
+  const child = spawn(pythonCommand, [path.join(__dirname, 'radar_optimo.py'), '--daemon'], {
+    stdio: ['pipe', 'pipe', 'pipe'],
+    cwd: __dirname
+  });
+  // `jobs` guarda { processInfo, payload } de los trabajos enviados y no
+  // terminados. Corren de a uno: `current` es el que recibió `started` y
+  // todavía no terminó (a él se le atribuye lo que el daemon escribe en stderr).
+  const daemon = { child, jobs: new Map(), current: null, ready: false, timer: null };
+  radarDaemons.set(pythonCommand, daemon);
+  console.log('Daemon de radar iniciado con PID:', child.pid);
+  
+  const finishCurrent = () => {
+    clearTimeout(daemon.timer);
+    daemon.timer = null;
+    daemon.current = null;
+  };
+  
+  let stdoutBuffer = '';
+  child.stdout.on('data', (data) => {
+    stdoutBuffer += data.toString();
+    const lines = stdoutBuffer.split('\n');
+    stdoutBuffer = lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) {
+        continue;
+      }
+      let event;
+      try {
+        event = JSON.parse(line);
+      } catch (error) {
+        console.log('Daemon stdout:', line);
+        continue;
+      }
+      if (event.event === 'ready') {
+        daemon.ready = true;
+        continue;
+      }
+      const job = daemon.jobs.get(String(event.id));
+      if (!job) {
+        continue;
+      }
+      const processInfo = job.processInfo;
+      if (event.event === 'started') {
+        processInfo.status = 'running';
+        processInfo.startTime = new Date();
+        daemon.current = processInfo;
+        daemon.timer = setTimeout(() => {
+          console.error(`Trabajo ${event.id} sin terminar tras ${RADAR_JOB_TIMEOUT_MS} ms, se reinicia el daemon ${child.pid}`);
+          processInfo.status = 'error';
+          processInfo.error = `Se superó el tiempo límite del trabajo (${Math.round(RADAR_JOB_TIMEOUT_MS / 1000)} s)`;
+          processInfo.endTime = new Date();
+          daemon.jobs.delete(String(event.id));
+          finishCurrent();
+          child.kill('SIGKILL');
+        }, RADAR_JOB_TIMEOUT_MS);
+        pushOutput(processInfo, `Trabajo ${event.id} iniciado en el daemon ${child.pid}`);
+      } else if (event.event === 'result') {
+        processInfo.results.push(event.result);
+      } else if (event.event === 'done' || event.event === 'error') {
+        processInfo.status = event.event === 'done' ? 'completed' : 'error';
+        processInfo.endTime = new Date();
+        processInfo.csvPath = event.output || processInfo.outputPath;
+        processInfo.metricsPath = event.metrics || metricsPathFor(processInfo.csvPath);
+        if (event.error) {
+          processInfo.error = event.error;
+        }
+        if (daemon.current === processInfo) {
+          finishCurrent();
+        }
+        daemon.jobs.delete(String(event.id));
+      }
+    }
+  });
+  
+  child.stderr.on('data', (data) => {
+    const output = data.toString().trim();
+    if (output) {
+      console.error('Daemon stderr:', output);
+      if (daemon.current) {
+        pushOutput(daemon.current, `ERROR: ${output}`);
+      }
+    }
+  });
+  
+  // Si el daemon termina, el trabajo en curso falla; los que esperaban en cola
+  // se reenvían a un daemon nuevo (solo si este llegó a arrancar, para no
+  // relanzar sin fin un ejecutable que no funciona).
+  let exited = false;
+  const onExit = (reason) => {
+    if (exited) {
+      return;
+    }
+    exited = true;
+    console.error(`Daemon de radar terminado: ${reason}`);
+    if (radarDaemons.get(pythonCommand) === daemon) {
+      radarDaemons.delete(pythonCommand);
+    }
+    const queued = [];
+    for (const job of daemon.jobs.values()) {
+      if (daemon.ready && job.processInfo.status === 'queued') {
+        queued.push(job);
+        continue;
+      }
+      job.processInfo.status = 'error';
+      job.processInfo.error = `El daemon terminó (${reason})`;
+      job.processInfo.endTime = new Date();
+    }
+    daemon.jobs.clear();
+    finishCurrent();
+    for (const job of queued) {
+      sendRadarJob(getRadarDaemon(pythonCommand), job);
+    }
+  };
+  child.on('close', (code, signal) => onExit(signal ? `señal ${signal}` : `código ${code}`));
+  child.on('error', (error) => onExit(error.message));
+  
+  return daemon;
+}
+
+// noticias.csv -> noticias.metrics.json (lo escribe radar_optimo.py al terminar)
+function metricsPathFor(csvPath) {
+  const parsed = path.parse(csvPath || 'noticias.csv');
+  return path.join(parsed.dir, `${parsed.name}.metrics.json`);
+}
+
+function sendRadarJob(daemon, job) {
+  job.processInfo.daemonPid = daemon.child.pid;
+  daemon.jobs.set(job.payload.id, job);
+  daemon.child.stdin.write(JSON.stringify(job.payload) + '\n');
+}
+
+function submitRadarJob(pythonCommand, job, outputPath) {
+  const jobId = `job-${nextJobId++}`;
+  const processInfo = {
+    pid: jobId,
+    daemonPid: null,
+    // 'queued' hasta que el daemon termina los trabajos anteriores y emite `started`
+    status: 'queued',
+    output: [],
+    results: [],
+    submitTime: new Date(),
+    startTime: null,
+    outputPath: outputPath
+  };
+  radarJobs.set(jobId, processInfo);
+  sendRadarJob(getRadarDaemon(pythonCommand), { processInfo, payload: { id: jobId, ...job } });
+  return jobId;
+}
+
+// Estado de una ejecución: `pid` es un id de trabajo del daemon ("job-N") o el
+// PID de un proceso lanzado con RADAR_DAEMON=0.
+function findExecution(pid) {
+  if (!pid) {
+    return undefined;
+  }
+  if (String(pid).startsWith('job-')) {
+    return radarJobs.get(String(pid));
+  }
+  return runningProcesses.get(parseInt(pid, 10));
+}
+
 // Endpoint to execute Python script
 app.post('/api/scraper/execute', (req, res) => {
   try {
@@ -72,8 +263,30 @@ app.post('/api/scraper/execute', (req, res) => {
       args.push('--deep-scrape');
     }
     
+    // Resultados en vivo: cada hallazgo llega por stdout como "RESULT {json}"
+    args.push('--stream-results');
+    
     // Execute the Python script - ACTUALIZADO para usar radar_optimo.py
     const pythonCommand = pythonExecutable || 'python3';
+    
+    if (USE_RADAR_DAEMON) {
+      const jobId = submitRadarJob(pythonCommand, {
+        keywords: keywords && keywords.length > 0 ? keywords : undefined,
+        sources: sources && sources.length > 0 ? sources : undefined,
+        twitter_users: twitterUsers && twitterUsers.length > 0 ? twitterUsers : undefined,
+        output: outputPath || undefined,
+        max_results: typeof maxResults === 'number' && maxResults > 0 ? maxResults : undefined,
+        validate_links: validateLinks === true,
+        today_only: todayOnly === true,
+        deep_scrape: deepScrape === true
+      }, outputPath);
+      console.log(`Trabajo ${jobId} enviado al daemon de radar`);
+      return res.json({
+        status: 'success',
+        pid: jobId,
+        message: 'Python script started successfully'
+      });
+    }
     const scriptPath = path.join(__dirname, 'radar_optimo.py');
     
     console.log(`Executing: ${pythonCommand} ${scriptPath} ${args.join(' ')}`);
@@ -90,18 +303,36 @@ app.post('/api/scraper/execute', (req, res) => {
       pid: process.pid,
       status: 'running',
       output: [],
+      results: [],
       startTime: new Date(),
       outputPath: outputPath
     };
     
     runningProcesses.set(process.pid, processInfo);
     
-    // Handle process output
+    // Handle process output: las líneas "RESULT {json}" son resultados en vivo
+    let stdoutBuffer = '';
     process.stdout.on('data', (data) => {
-      const output = data.toString().trim();
-      if (output) {
+      stdoutBuffer += data.toString();
+      const lines = stdoutBuffer.split('\n');
+      stdoutBuffer = lines.pop();
+      for (const line of lines) {
+        const output = line.trim();
+        if (!output) {
+          continue;
+        }
+        if (output.startsWith('RESULT ')) {
+          try {
+            const result = JSON.parse(output.slice('RESULT '.length));
+            processInfo.results.push(result);
+            console.log(`Resultado en vivo (${processInfo.results.length}): ${result.title}`);
+            continue;
+          } catch (error) {
+            console.error('Error parseando resultado en vivo:', error);
+          }
+        }
         console.log('Python stdout:', output);
-        processInfo.output.push(output);
+        pushOutput(processInfo, output);
       }
     });
     
@@ -109,7 +340,7 @@ app.post('/api/scraper/execute', (req, res) => {
       const error = data.toString().trim();
       if (error) {
         console.error('Python stderr:', error);
-        processInfo.output.push(`ERROR: ${error}`);
+        pushOutput(processInfo, `ERROR: ${error}`);
       }
     });
     
@@ -118,6 +349,7 @@ app.post('/api/scraper/execute', (req, res) => {
       processInfo.status = code === 0 ? 'completed' : 'error';
       processInfo.endTime = new Date();
       processInfo.csvPath = outputPath;
+      processInfo.metricsPath = metricsPathFor(outputPath);
       
       if (code !== 0) {
         processInfo.error = `Script exited with code ${code}`;
@@ -150,8 +382,8 @@ app.post('/api/scraper/execute', (req, res) => {
 app.get('/api/scraper/status', (req, res) => {
   const { pid } = req.query;
   console.log('Status check for PID:', pid);
-  if (pid && runningProcesses.has(parseInt(pid))) {
-    const processInfo = runningProcesses.get(parseInt(pid));
+  const processInfo = findExecution(pid);
+  if (processInfo) {
     res.json(processInfo);
   } else {
     res.status(404).json({
@@ -192,6 +424,40 @@ app.get('/api/scraper/csv', (req, res) => {
   }
 });
 
+// Endpoint de métricas por etapa y por dominio de una corrida
+app.get('/api/scraper/metrics', (req, res) => {
+  const { pid, path: csvPath } = req.query;
+  let metricsPath;
+  const processInfo = findExecution(pid);
+  if (processInfo) {
+    metricsPath = processInfo.metricsPath || metricsPathFor(processInfo.outputPath);
+  } else if (csvPath) {
+    metricsPath = metricsPathFor(csvPath);
+  } else {
+    return res.status(400).json({
+      status: 'error',
+      error: 'pid or CSV path required'
+    });
+  }
+  
+  try {
+    if (fs.existsSync(metricsPath)) {
+      res.json(JSON.parse(fs.readFileSync(metricsPath, 'utf8')));
+    } else {
+      res.status(404).json({
+        status: 'error',
+        error: 'Metrics file not found'
+      });
+    }
+  } catch (error) {
+    console.error('Error reading metrics:', error);
+    res.status(500).json({
+      status: 'error',
+      error: error.message
+    });
+  }
+});
+
 // Nuevo endpoint mejorado para obtener noticias del día
 app.get('/api/news/today', async (req, res) => {
   try {
@@ -13,6 +13,8 @@ import tweepy
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
+from radar_keywords import KeywordMatcher
+from radar_dates import extract_publish_date
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -86,49 +88,12 @@ retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503,
 session.mount('http://', HTTPAdapter(max_retries=retries))
 session.mount('https://', HTTPAdapter(max_retries=retries))
 
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
+
 def is_relevant(text, title=""):
     """Verifica si el texto o título contiene palabras clave, con puntuación."""
-    score = 0
-    text_lower = (text + " " + title).lower()
-    for keyword in KEYWORDS:
-        if keyword.lower() in text_lower:
-            score += 1
-    return score > 0, score
-
-def extract_date_from_html(soup):
-    """Intenta extraer la fecha desde el HTML si newspaper no la encuentra."""
-    try:
-        date_tags = soup.find_all(['time', 'meta'], {'property': ['article:published_time', 'og:published_time', 'datePublished', 'dc.date', 'pubdate']})
-        for tag in date_tags:
-            date_str = tag.get('datetime') or tag.get('content') or tag.get_text()
-            if date_str:
-                try:
-                    return datetime.fromisoformat(date_str.replace('Z', '+00:00')).date()
-                except ValueError:
-                    continue
-        # Buscar patrones de fecha en el texto
-        text = soup.get_text()
-        date_patterns = [
-            r'\b(\d{4}-\d{2}-\d{2})\b',
-            r'\b(\d{1,2}/\d{1,2}/\d{4})\b',
-            r'\b(\d{1,2}\s+(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)\s+\d{4})\b'
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    date_str = match.group(1)
-                    if '-' in date_str:
-                        return datetime.strptime(date_str, '%Y-%m-%d').date()
-                    elif '/' in date_str:
-                        return datetime.strptime(date_str, '%d/%m/%Y').date()
-                    else:
-                        return datetime.strptime(date_str, '%d %B %Y').date()
-                except ValueError:
-                    continue
-    except Exception as e:
-        logging.warning(f"Error extrayendo fecha del HTML: {e}")
-    return None
+    is_rel, score, _ = KEYWORD_MATCHER.match(text, title)
+    return is_rel, score
 
 def is_article_url(url):
     """Filtra URLs que probablemente sean artículos."""
@@ -150,9 +115,7 @@ def process_article(url, source_url):
         article = Article(url, request_timeout=20)  # Timeout aumentado a 20 segundos
         article.download()
         article.parse()
-        soup = BeautifulSoup(article.html, 'html.parser')
-        
-        publish_date = article.publish_date.date() if article.publish_date else extract_date_from_html(soup)
+        publish_date = article.publish_date.date() if article.publish_date else extract_publish_date(article.html, url)
         if not publish_date:
             logging.warning(f"No se pudo extraer fecha para {url}, usando fecha actual")
             publish_date = TODAY
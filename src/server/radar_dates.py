@@ -0,0 +1,186 @@
+"""Fecha de publicación de un artículo a partir del HTML crudo y la URL.
+
+Se usa cuando newspaper no encuentra la fecha. En orden, de la señal más
+confiable a la menos:
+
+1. JSON-LD (`datePublished`, luego `dateCreated`)
+2. metadatos (`article:published_time`, `itemprop="datePublished"`,
+   `pubdate`, `dc.date`, ...)
+3. la ruta de la URL (`/2024/05/12/`, `/2024-05-12/`, `/20240512/`)
+4. el primer `<time datetime>` del documento
+5. como último recurso, el texto visible alrededor del titular (desde un
+   poco antes del primer `<h1>`, o de `<article>`, `<main>` o `<body>`; a lo
+   sumo TEXT_CHARS caracteres de HTML_WINDOW de HTML), donde se buscan
+   fechas numéricas y con el mes en letras ("12 de mayo de 2024", "mayo 12,
+   2024"), sin strptime ni depender del locale. Empezar por el titular
+   saltea los menús, que en las portadas de los diarios ocupan miles de
+   caracteres antes de la nota.
+
+Todo con expresiones precompiladas sobre el HTML, sin armar un DOM ni el
+texto completo del documento.
+"""
+from datetime import date
+import html as html_lib
+import re
+
+HTML_WINDOW = 20000
+TEXT_CHARS = 5000
+BEFORE_ANCHOR = 1000  # la fecha a veces va arriba del titular
+MIN_YEAR = 1990
+MAX_YEAR = 2100
+
+MONTHS = {
+    'enero': 1, 'ene': 1, 'january': 1, 'jan': 1,
+    'febrero': 2, 'feb': 2, 'february': 2,
+    'marzo': 3, 'mar': 3, 'march': 3,
+    'abril': 4, 'abr': 4, 'april': 4, 'apr': 4,
+    'mayo': 5, 'may': 5,
+    'junio': 6, 'jun': 6, 'june': 6,
+    'julio': 7, 'jul': 7, 'july': 7,
+    'agosto': 8, 'ago': 8, 'august': 8, 'aug': 8,
+    'septiembre': 9, 'setiembre': 9, 'sept': 9, 'sep': 9, 'set': 9, 'september': 9,
+    'octubre': 10, 'oct': 10, 'october': 10,
+    'noviembre': 11, 'nov': 11, 'november': 11,
+    'diciembre': 12, 'dic': 12, 'december': 12, 'dec': 12,
+}
+# Los nombres largos primero para que "mayo" no quede como "may"
+_MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+
+# Metadatos de fecha de publicación, de mayor a menor prioridad
+META_KEYS = (
+    'article:published_time', 'og:published_time', 'datepublished', 'pubdate',
+    'publishdate', 'publish-date', 'dc.date.issued', 'dc.date', 'date',
+    'parsely-pub-date', 'sailthru.date', 'cxenseparse:recs:publishtime',
+)
+_META_PRIORITY = {key: i for i, key in enumerate(META_KEYS)}
+
+_JSON_LD = re.compile(r'<script\b[^>]*application/ld\+json[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+_JSON_DATE = {
+    key: re.compile(r'"' + key + r'"\s*:\s*"([^"]{6,40})"')
+    for key in ('datePublished', 'dateCreated')
+}
+_META_TAG = re.compile(r'<meta\b([^>]*)>', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+_TIME_TAG = re.compile(r'<time\b[^>]*?\bdatetime\s*=\s*["\']([^"\']+)', re.IGNORECASE)
+_URL_DATE = re.compile(
+    r'/((?:19|20)\d{2})([/-])(\d{1,2})\2(\d{1,2})(?=[/._-]|$)'
+    r'|/((?:19|20)\d{2})(\d{2})(\d{2})(?=/)'
+)
+_ISO_PREFIX = re.compile(r'\s*(\d{4})[-/](\d{1,2})[-/](\d{1,2})')
+_ANCHORS = [re.compile(r'<' + tag + r'\b', re.IGNORECASE) for tag in ('h1', 'article', 'main', 'body')]
+_NON_TEXT_BLOCKS = re.compile(r'<(script|style|noscript|svg)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r'<[^>]*>')
+_TEXT_DATE = re.compile(
+    r'\b(?:'
+    r'(?P<iy>\d{4})-(?P<im>\d{1,2})-(?P<id>\d{1,2})'
+    r'|(?P<nd>\d{1,2})[/.-](?P<nm>\d{1,2})[/.-](?P<ny>\d{4})'
+    r'|(?P<ld>\d{1,2})[º°]?\s+(?:de\s+)?(?P<lm>' + _MONTH_NAMES + r')\.?,?\s+(?:de(?:l)?\s+)?(?P<ly>\d{4})'
+    r'|(?P<um>' + _MONTH_NAMES + r')\.?\s+(?P<ud>\d{1,2}),?\s+(?:de\s+)?(?P<uy>\d{4})'
+    r')\b',
+    re.IGNORECASE
+)
+
+def _make_date(year, month, day):
+    try:
+        year, month, day = int(year), int(month), int(day)
+        if MIN_YEAR <= year <= MAX_YEAR:
+            return date(year, month, day)
+    except ValueError:
+        pass
+    return None
+
+def parse_date_value(value):
+    """Fecha de un valor de metadato o JSON-LD.
+
+    Primero ISO 8601 (`2024-05-12T10:00`, `2024/05/12`); si no, las mismas
+    formas que en el texto visible: `12/05/2024` (día primero), "12 de mayo
+    de 2024", "Sun, 12 May 2024 10:00:00 GMT", "May 12, 2024".
+
+    >>> parse_date_value('12/05/2024')
+    datetime.date(2024, 5, 12)
+    >>> parse_date_value('Sun, 12 May 2024 10:00:00 GMT')
+    datetime.date(2024, 5, 12)
+    """
+    match = _ISO_PREFIX.match(value)
+    if match:
+        return _make_date(*match.groups())
+    return date_from_text(value)
+
+def date_from_json_ld(html):
+    blocks = _JSON_LD.findall(html)
+    for pattern in _JSON_DATE.values():
+        for block in blocks:
+            for value in pattern.findall(block):
+                found = parse_date_value(value)
+                if found:
+                    return found
+    return None
+
+def date_from_meta(html):
+    best = None
+    best_priority = len(META_KEYS)
+    for match in _META_TAG.finditer(html):
+        attributes = {}
+        for name, double, single, bare in _ATTRIBUTE.findall(match.group(1)):
+            attributes[name.lower()] = double or single or bare
+        content = attributes.get('content')
+        if not content:
+            continue
+        key = (attributes.get('property') or attributes.get('name') or attributes.get('itemprop') or '').lower()
+        priority = _META_PRIORITY.get(key)
+        if priority is None or priority >= best_priority:
+            continue
+        found = parse_date_value(content)
+        if found:
+            best, best_priority = found, priority
+            if priority == 0:
+                break
+    return best
+
+def date_from_url(url):
+    match = _URL_DATE.search(url or '')
+    if not match:
+        return None
+    if match.group(1):
+        return _make_date(match.group(1), match.group(3), match.group(4))
+    return _make_date(match.group(5), match.group(6), match.group(7))
+
+def date_from_time_tag(html):
+    match = _TIME_TAG.search(html)
+    return parse_date_value(match.group(1)) if match else None
+
+def visible_text_head(html):
+    """Texto visible desde el titular de la nota, acotado a TEXT_CHARS."""
+    start = 0
+    for anchor in _ANCHORS:
+        match = anchor.search(html)
+        if match:
+            start = max(0, match.start() - BEFORE_ANCHOR)
+            break
+    window = html[start:start + HTML_WINDOW]
+    text = _TAGS.sub(' ', _NON_TEXT_BLOCKS.sub(' ', window))
+    return html_lib.unescape(text[:TEXT_CHARS * 2])[:TEXT_CHARS]
+
+def date_from_text(text):
+    for match in _TEXT_DATE.finditer(text):
+        if match['iy']:
+            found = _make_date(match['iy'], match['im'], match['id'])
+        elif match['ny']:
+            found = _make_date(match['ny'], match['nm'], match['nd'])
+        elif match['ly']:
+            found = _make_date(match['ly'], MONTHS[match['lm'].lower()], match['ld'])
+        else:
+            found = _make_date(match['uy'], MONTHS[match['um'].lower()], match['ud'])
+        if found:
+            return found
+    return None
+
+def extract_publish_date(html, url=None):
+    """Fecha de publicación de un artículo, o None si no aparece."""
+    return (
+        date_from_json_ld(html)
+        or date_from_meta(html)
+        or date_from_url(url)
+        or date_from_time_tag(html)
+        or date_from_text(visible_text_head(html))
+    )
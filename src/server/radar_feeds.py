@@ -0,0 +1,116 @@
+"""Descubrimiento y lectura de feeds RSS/Atom para el modo --feeds de radar_optimo.py."""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/feed+xml', 'application/xml', 'text/xml')
+
+def discover_feed_links(soup, base_url):
+    """Devuelve las URLs de <link rel="alternate"> que apuntan a feeds RSS/Atom."""
+    feeds = []
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        if 'alternate' not in [value.lower() for value in rel]:
+            continue
+        if (link.get('type') or '').split(';')[0].strip().lower() not in FEED_TYPES:
+            continue
+        url = urljoin(base_url, link['href'])
+        if url not in feeds:
+            feeds.append(url)
+    return feeds
+
+class FeedItem:
+    """Ítem de un feed: enlace, título, resumen (HTML) y fecha si la trae."""
+    __slots__ = ('link', 'title', 'summary', 'date')
+
+    def __init__(self, link, title, summary, item_date):
+        self.link = link
+        self.title = title
+        self.summary = summary
+        self.date = item_date
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _parse_date(value):
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value).date()  # RSS: RFC 822
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()  # Atom: RFC 3339
+    except ValueError:
+        return None
+
+def parse_feed(content, base_url):
+    """Parsea un feed RSS 2.0 / Atom y devuelve la lista de FeedItem."""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        logging.debug("Feed inválido %s: %s", base_url, e)
+        return []
+    items = []
+    for element in root.iter():
+        if _local_name(element.tag) not in ('item', 'entry'):
+            continue
+        link = title = summary = published = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'link':
+                # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+                href = child.get('href')
+                if href and child.get('rel', 'alternate') == 'alternate':
+                    link = link or href
+                elif child.text and child.text.strip():
+                    link = link or child.text.strip()
+            elif name == 'title':
+                title = (child.text or '').strip()
+            elif name in ('description', 'summary') or (name == 'content' and summary is None):
+                summary = child.text or ''
+            elif name in ('pubDate', 'published', 'date') or (name == 'updated' and published is None):
+                published = child.text
+        if link:
+            items.append(FeedItem(urljoin(base_url, link), title or '', summary or '', _parse_date(published)))
+    return items
+
+def load_feed_cache(path):
+    """Lee las URLs de feeds descubiertas en corridas anteriores."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning("No se pudo leer el caché de feeds %s: %s", path, e)
+        return {}
+
+def save_feed_cache(path, cache):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def cache_entry(feeds):
+    return {"feeds": feeds, "updated": datetime.now(timezone.utc).isoformat()}
+
+def cached_feeds(cache, source_url, max_age_seconds):
+    """Feeds guardados de una fuente, o None si no hay o están vencidos."""
+    entry = cache.get(source_url)
+    if not entry:
+        return None
+    try:
+        updated = datetime.fromisoformat(entry['updated'])
+    except (KeyError, ValueError):
+        return None
+    if (datetime.now(timezone.utc) - updated).total_seconds() > max_age_seconds:
+        return None
+    return entry.get('feeds', [])
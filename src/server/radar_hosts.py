@@ -0,0 +1,163 @@
+"""Control de concurrencia y de tasa por dominio para radar_optimo.py."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import json
+import logging
+import os
+import time
+
+# Ajustes del control AIMD (aumento aditivo, disminución multiplicativa)
+RATE_INCREASE = 0.05   # req/s sumados por cada respuesta exitosa
+RATE_DECREASE = 0.5    # factor aplicado ante 429/503
+MIN_RATE = 0.1         # nunca bajar de una solicitud cada 10 s
+DEFAULT_BACKOFF = 5.0  # pausa si el servidor no envía Retry-After
+SERVER_ERROR_BACKOFF = 1.0  # primera espera ante 500/502/504; se duplica en cada intento
+MAX_BACKOFF = 120.0
+
+def parse_retry_after(value):
+    """Convierte un encabezado Retry-After (segundos o fecha HTTP) en segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class HostLimiter:
+    """Límite de concurrencia (semáforo) y de tasa (token bucket) de un dominio.
+
+    Los dos límites están separados: la espera por un token o por una pausa
+    (p. ej. tras un 429) ocurre antes de tomar el semáforo, así nunca se
+    duerme ocupando un lugar.
+    """
+
+    def __init__(self, max_concurrency, rate, burst, global_semaphore=None, initial_rate=None):
+        self.max_concurrency = max_concurrency
+        # `max_rate` es el techo configurado; `rate` es la tasa actual (AIMD)
+        self.max_rate = rate
+        self.rate = rate
+        if initial_rate:
+            self.rate = min(initial_rate, rate) if rate > 0 else initial_rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.global_semaphore = global_semaphore
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0
+        self.server_errors = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def wait_token(self):
+        """Espera hasta poder emitir una solicitud (rate 0 = sin límite de tasa)."""
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Bloquea nuevas solicitudes al dominio durante `seconds` segundos."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def on_success(self):
+        """Aumento aditivo de la tasa hasta el techo configurado."""
+        if self.rate > 0 and (self.max_rate <= 0 or self.rate < self.max_rate):
+            self.rate += RATE_INCREASE
+            if self.max_rate > 0:
+                self.rate = min(self.rate, self.max_rate)
+
+    def _decrease(self):
+        self._refill(time.monotonic())
+        current = self.rate if self.rate > 0 else float(self.burst)
+        self.rate = max(MIN_RATE, current * RATE_DECREASE)
+        self.tokens = min(self.tokens, 0.0)
+
+    def on_throttle(self, retry_after=None):
+        """Disminución multiplicativa de la tasa y pausa (Retry-After si existe).
+        Devuelve la pausa aplicada."""
+        self.throttled += 1
+        self._decrease()
+        backoff = min(retry_after if retry_after is not None else DEFAULT_BACKOFF, MAX_BACKOFF)
+        self.pause(backoff)
+        return backoff
+
+    def on_server_error(self, attempt):
+        """Ante un 5xx reintentable: disminución multiplicativa de la tasa y
+        espera exponencial para el reintento (`attempt` empieza en 0).
+
+        Devuelve la espera; la duerme solo la solicitud que falló, porque un
+        500 puede ser de una URL y no del dominio entero.
+        """
+        self.server_errors += 1
+        self._decrease()
+        return min(SERVER_ERROR_BACKOFF * 2 ** attempt, MAX_BACKOFF)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Token primero, después semáforo del dominio y por último el global.
+
+        Se toma el semáforo del dominio antes que el global para no ocupar
+        lugares globales mientras se espera a un dominio saturado.
+        """
+        await self.wait_token()
+        async with self.semaphore:
+            if self.global_semaphore:
+                await self.global_semaphore.acquire()
+            self.requests += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                if self.global_semaphore:
+                    self.global_semaphore.release()
+
+
+def load_host_state(path):
+    """Lee la última tasa buena conocida de cada dominio."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning("No se pudo leer el estado de dominios %s: %s", path, e)
+        return {}
+
+def save_host_state(path, limiters, previous=None):
+    """Guarda la tasa actual de cada dominio para el próximo arranque y
+    devuelve el estado guardado."""
+    state = dict(previous or {})
+    now = datetime.now(timezone.utc).isoformat()
+    for domain, limiter in limiters.items():
+        if limiter.requests == 0 or limiter.rate <= 0:
+            continue
+        state[domain] = {"rate": round(limiter.rate, 3), "throttled": limiter.throttled, "updated": now}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return state
@@ -0,0 +1,140 @@
+"""Caché HTTP en disco con solicitudes condicionales (ETag / Last-Modified).
+
+Guarda el cuerpo y los validadores de cada respuesta para que la corrida
+siguiente pueda enviar If-None-Match / If-Modified-Since y reutilizar el
+cuerpo guardado cuando el servidor responde 304.
+
+get, store, revalidate y prune leen y escriben archivos enteros (JSON y
+base64): radar_optimo.py los llama con asyncio.to_thread para no frenar el
+event loop, por eso los contadores se actualizan bajo un lock.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+class HttpDiskCache:
+    """Caché de respuestas HTTP en un directorio, acotado por tamaño y TTL."""
+
+    def __init__(self, directory, max_bytes, ttl_seconds):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = max_bytes > 0
+        self.revalidated = 0
+        self.stored = 0
+        self.bytes_saved = 0
+        self.lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        """Devuelve la entrada guardada para la URL o None si no existe o venció."""
+        if not self.enabled:
+            return None
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url or time.time() - entry.get('validated_at', 0) > self.ttl_seconds:
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        """Encabezados de validación para una entrada guardada."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, body):
+        """Guarda la respuesta si trae algún validador (`body` puede ser str o bytes)."""
+        if not self.enabled:
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'validated_at': time.time(),
+        }
+        if isinstance(body, bytes):
+            entry['body_b64'] = base64.b64encode(body).decode('ascii')
+        else:
+            entry['body'] = body
+        self._write(url, entry)
+        with self.lock:
+            self.stored += 1
+
+    def revalidate(self, url, entry):
+        """Marca como vigente una entrada confirmada por un 304 y devuelve su cuerpo."""
+        entry['validated_at'] = time.time()
+        self._write(url, entry)
+        if 'body_b64' in entry:
+            body = base64.b64decode(entry['body_b64'])
+        else:
+            body = entry['body']
+        with self.lock:
+            self.revalidated += 1
+            self.bytes_saved += len(body)
+        return body
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        # Único por proceso y por hilo: las escrituras corren con asyncio.to_thread
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.debug("No se pudo escribir el caché HTTP de %s: %s", url, e)
+
+    def prune(self):
+        """Elimina entradas vencidas y, si se supera el tope, las más antiguas."""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        files = []
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                removed += self._remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
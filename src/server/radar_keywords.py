@@ -0,0 +1,238 @@
+"""Búsqueda de palabras clave compilada una sola vez a partir de la lista.
+
+Lo usan radar.py, radar_grok.py y radar_optimo.py. Según la cantidad de
+palabras clave distintas se elige el recorrido más rápido:
+
+- hasta SUBSTRING_LIMIT palabras, un `str.find` por palabra (como el `in`
+  original: cada búsqueda corre en C y con pocas palabras nada le gana);
+- más palabras, un autómata Aho-Corasick de pyahocorasick (opcional, en C)
+  que recorre el texto una sola vez sin importar cuántas palabras haya;
+- sin pyahocorasick, el mismo autómata en Python puro, a partir de
+  PYTHON_AUTOMATON_LIMIT palabras (por debajo sigue ganando `str.find`).
+
+Los tres devuelven lo mismo: todas las apariciones, solapadas incluidas.
+"""
+import re
+import unicodedata
+from collections import deque
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+SUBSTRING_LIMIT = 50
+PYTHON_AUTOMATON_LIMIT = 200
+
+def _build_fold_table():
+    """{carácter con tilde: letra base} en minúscula (rango Latin-1)."""
+    table = {}
+    for code in range(0xC0, 0x100):
+        char = chr(code)
+        base = unicodedata.normalize('NFD', char.lower())[0]
+        if len(char.lower()) == 1 and base != char:
+            table[char] = base
+    return table
+
+_FOLD_TABLE = _build_fold_table()
+# Reemplazar solo los caracteres con tilde es unas tres veces más rápido que
+# str.translate, que consulta el dict por cada carácter del texto.
+_ACCENTED = re.compile('[' + ''.join(_FOLD_TABLE) + ']')
+
+def _fold_match(match):
+    return _FOLD_TABLE[match.group()]
+
+def fold_text(text, fold_accents=False):
+    """Normaliza un texto para comparar: minúsculas y, opcionalmente, sin tildes."""
+    text = text.lower()
+    if fold_accents and not text.isascii():
+        text = _ACCENTED.sub(_fold_match, text)
+    return text
+
+class _PythonAutomaton:
+    """Autómata Aho-Corasick determinista en Python puro."""
+
+    def __init__(self, patterns):
+        # goto[state] = {char: next_state}; out[state] = patrones que terminan ahí
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+                self.goto[state][char] = next_state
+            state = next_state
+        self.out[state] = self.out[state] + (pattern,)
+
+    def _link(self):
+        """Calcula los enlaces de falla en orden BFS y arma el autómata determinista.
+
+        `delta[state]` guarda las transiciones completas (incluidas las que se
+        heredan por los enlaces de falla) salvo las que coinciden con las de la
+        raíz, que se consultan en `root`; así el recorrido hace a lo sumo dos
+        búsquedas en dicts por carácter sin duplicar la raíz en cada estado.
+        """
+        self.root = dict(self.goto[0])
+        self.delta = [None] * len(self.goto)
+        self.delta[0] = {}
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self.delta[state] = {**self.delta[self.fail[state]], **self.goto[state]}
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                if state:
+                    parent_fail = self.fail[state]
+                    target = self.delta[parent_fail].get(char) or self.root.get(char, 0)
+                else:
+                    target = 0
+                self.fail[next_state] = target
+                self.out[next_state] = self.out[next_state] + self.out[target]
+
+    def iter(self, text):
+        """Genera (posición del último carácter, patrón) por cada aparición."""
+        delta, out, root_get = self.delta, self.out, self.root.get
+        state = 0
+        for position, char in enumerate(text):
+            state = delta[state].get(char) or root_get(char, 0)
+            if out[state]:
+                for pattern in out[state]:
+                    yield position, pattern
+
+class KeywordMatcher:
+    """Búsqueda de una lista de palabras clave (ver el docstring del módulo).
+
+    - `fold_accents`: "política" coincide con "politica" (y viceversa). Por
+      defecto se distinguen las tildes, igual que el `in` original.
+    - `word_boundary`: solo cuenta coincidencias que sean palabras completas;
+      por defecto se buscan subcadenas.
+
+    Cada entrada de la lista cuenta para el puntaje, como en el original:
+    una palabra clave repetida suma dos veces.
+    """
+
+    def __init__(self, keywords, fold_accents=False, word_boundary=False):
+        self.keywords = list(keywords)
+        self.fold_accents = fold_accents
+        self.word_boundary = word_boundary
+        # patrón normalizado -> palabras clave de la lista (con repetidas)
+        self.entries = {}
+        for keyword in self.keywords:
+            pattern = fold_text(keyword, fold_accents)
+            if pattern:
+                self.entries.setdefault(pattern, []).append(keyword)
+        self.patterns = sorted(self.entries)
+        limit = SUBSTRING_LIMIT if ahocorasick is not None else PYTHON_AUTOMATON_LIMIT
+        if len(self.patterns) <= limit:
+            self.engine = 'substring'
+            self.automaton = None
+        elif ahocorasick is not None:
+            self.engine = 'pyahocorasick'
+            self.automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                self.automaton.add_word(pattern, pattern)
+            self.automaton.make_automaton()
+        else:
+            self.engine = 'python'
+            self.automaton = _PythonAutomaton(self.patterns)
+
+    def _occurrences(self, text):
+        """Genera (inicio, patrón) por cada aparición en un texto ya normalizado."""
+        if self.automaton is None:
+            for pattern in self.patterns:
+                start = text.find(pattern)
+                while start != -1:
+                    yield start, pattern
+                    start = text.find(pattern, start + 1)
+        else:
+            for end, pattern in self.automaton.iter(text):
+                yield end - len(pattern) + 1, pattern
+
+    def _matches(self, text):
+        """Genera el patrón de cada aparición que cumple las opciones."""
+        text = fold_text(text, self.fold_accents)
+        if not self.word_boundary:
+            for _, pattern in self._occurrences(text):
+                yield pattern
+            return
+        for start, pattern in self._occurrences(text):
+            if self._is_word(text, start, start + len(pattern)):
+                yield pattern
+
+    def pattern_counts(self, text):
+        """Devuelve {patrón: cantidad_de_apariciones} para los que aparecen."""
+        counts = {}
+        for pattern in self._matches(text):
+            counts[pattern] = counts.get(pattern, 0) + 1
+        return counts
+
+    def count(self, text):
+        """Devuelve {palabra_clave: cantidad_de_apariciones} para las que aparecen."""
+        return {
+            keyword: hits
+            for pattern, hits in self.pattern_counts(text).items()
+            for keyword in self.entries[pattern]
+        }
+
+    def contains_any(self, text):
+        """Indica si aparece alguna palabra clave; corta en la primera."""
+        if self.automaton is None and not self.word_boundary:
+            text = fold_text(text, self.fold_accents)
+            return any(pattern in text for pattern in self.patterns)
+        for _ in self._matches(text):
+            return True
+        return False
+
+    @staticmethod
+    def _is_word(text, start, end):
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def match(self, text, title=""):
+        """Devuelve (es_relevante, puntaje, apariciones_por_palabra).
+
+        El puntaje es la cantidad de entradas de la lista encontradas, igual
+        que el cálculo original.
+        """
+        counts = self.pattern_counts(text + " " + title)
+        score = sum(len(self.entries[pattern]) for pattern in counts)
+        hits = {keyword: found for pattern, found in counts.items() for keyword in self.entries[pattern]}
+        return score > 0, score, hits
+
+class KeywordProfiles:
+    """Varios conjuntos de palabras clave con nombre (un perfil por usuario o
+    por boletín) evaluados en una sola pasada.
+
+    Se arma un único KeywordMatcher con la unión de todas las palabras: cada
+    texto se recorre una vez y las apariciones se reparten después entre los
+    perfiles que contienen cada palabra.
+    """
+
+    def __init__(self, profiles, fold_accents=False, word_boundary=False):
+        self.profiles = {name: list(keywords) for name, keywords in profiles.items()}
+        # palabra clave -> perfiles que la tienen (una vez por cada entrada)
+        self.keyword_profiles = {}
+        for name, keywords in self.profiles.items():
+            for keyword in keywords:
+                self.keyword_profiles.setdefault(keyword, []).append(name)
+        self.matcher = KeywordMatcher(list(self.keyword_profiles), fold_accents, word_boundary)
+
+    def match(self, text, title=""):
+        """Devuelve {perfil: (puntaje, apariciones_por_palabra)} de los perfiles
+        relevantes; el puntaje es el de KeywordMatcher.match para ese perfil."""
+        matched = {}
+        scores = {}
+        for keyword, hits in self.matcher.count(text + " " + title).items():
+            for name in self.keyword_profiles[keyword]:
+                matched.setdefault(name, {})[keyword] = hits
+                scores[name] = scores.get(name, 0) + 1
+        return {name: (scores[name], hits) for name, hits in matched.items()}
@@ -0,0 +1,89 @@
+"""Logging de radar_optimo.py fuera del event loop.
+
+El hilo del loop solo encola el LogRecord (QueueHandler); un QueueListener
+en un hilo aparte le da formato y lo escribe en el archivo, en stderr y, con
+--log-json, en un archivo JSON lines. Así un stderr lento (el pipe que lee
+python-executor.js) o un disco lento no frenan las descargas.
+
+Los mensajes se pasan con formato `%` perezoso (`logging.debug("... %s", url)`):
+un mensaje de un nivel desactivado no se arma, y uno activo se arma en el
+hilo del listener. Los archivos rotan por tamaño (--log-max-mb, --log-backups).
+"""
+import atexit
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler que no formatea al encolar.
+
+    QueueHandler.prepare arma el mensaje en el hilo que loguea (pensado para
+    mandar el registro a otro proceso); acá el listener vive en el mismo
+    proceso y el registro viaja tal cual, con sus argumentos. En los procesos
+    de parseo (fork del principal) no hay listener: se escribe directo.
+    """
+
+    def __init__(self, records, handlers):
+        super().__init__(records)
+        self.pid = os.getpid()
+        self.direct_handlers = handlers
+
+    def prepare(self, record):
+        return record
+
+    def emit(self, record):
+        if os.getpid() != self.pid:
+            for handler in self.direct_handlers:
+                handler.handle(record)
+            return
+        super().emit(record)
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objeto JSON por línea: fecha, nivel, logger, mensaje y excepción si la hay."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def _file_handler(path, max_bytes, backups):
+    if max_bytes > 0:
+        return RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    return logging.FileHandler(path, encoding='utf-8')
+
+def start_logging(log_path, level=logging.INFO, json_path=None, max_bytes=0, backups=3):
+    """Configura el logger raíz con una cola y arranca el listener.
+
+    Devuelve el QueueListener (se detiene solo al salir, vaciando la cola).
+    """
+    text_formatter = logging.Formatter(TEXT_FORMAT)
+    handlers = [_file_handler(log_path, max_bytes, backups), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(text_formatter)
+    if json_path:
+        json_handler = _file_handler(json_path, max_bytes, backups)
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(records, handlers))
+    root.setLevel(level)
+
+    listener = QueueListener(records, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
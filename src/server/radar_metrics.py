@@ -0,0 +1,191 @@
+"""Métricas por etapa de una corrida de radar_optimo.py.
+
+Cada etapa de scrape_site / process_article (descubrimiento de secciones,
+sitemaps, feeds, validación, descarga, prefiltro, parseo, fecha, palabras
+clave y salida) se mide con un histograma de duración; por dominio se
+cuentan solicitudes, bytes recibidos, códigos de estado y reintentos.
+
+Al terminar la corrida se guarda un resumen JSON junto al CSV
+(`noticias.metrics.json`) y, con --metrics-prom, el mismo contenido en
+formato de texto de Prometheus (para el textfile collector de
+node_exporter o para servirlo tal cual).
+
+Las duraciones son de reloj: las etapas corren en paralelo, así que la suma
+de todas supera la duración de la corrida. `date` y `parse_cpu` son tiempo de
+CPU medido dentro de los procesos de parseo.
+"""
+from contextlib import contextmanager
+import json
+import os
+import time
+
+# Límites superiores de los buckets (segundos), como los de los clientes de Prometheus
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROMETHEUS_PREFIX = 'radar'
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Cuantil aproximado: el límite del bucket donde cae (el máximo si es el último)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": round(self.max, 6),
+            "buckets": {str(bound): count for bound, count in zip(BUCKETS, self.counts) if count},
+        }
+
+class HostMetrics:
+    __slots__ = ('requests', 'bytes', 'retries', 'errors', 'statuses')
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.statuses = {}
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+class RunMetrics:
+    """Histogramas por etapa, contadores sueltos y contadores por dominio de una corrida."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.hosts = {}
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def host(self, domain):
+        metrics = self.hosts.get(domain)
+        if metrics is None:
+            metrics = self.hosts[domain] = HostMetrics()
+        return metrics
+
+    def response(self, domain, status, size):
+        metrics = self.host(domain)
+        metrics.requests += 1
+        metrics.bytes += size
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def to_dict(self):
+        return {
+            "started": self.started,
+            "duration_seconds": round(time.time() - self.started, 3),
+            "stages": {name: histogram.to_dict() for name, histogram in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "hosts": {domain: metrics.to_dict() for domain, metrics in sorted(self.hosts.items())},
+        }
+
+    def prometheus(self):
+        """Texto en formato de exposición de Prometheus."""
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_stage_duration_seconds Duración de cada etapa de la corrida",
+            f"# TYPE {p}_stage_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{p}_stage_duration_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{p}_stage_duration_seconds_count{{stage="{name}"}} {histogram.count}')
+
+        lines += [f"# HELP {p}_events_total Contadores de la corrida", f"# TYPE {p}_events_total counter"]
+        lines += [f'{p}_events_total{{event="{name}"}} {value}' for name, value in sorted(self.counters.items())]
+
+        host_series = [
+            ('requests', 'Respuestas recibidas por dominio'),
+            ('bytes', 'Bytes recibidos por dominio'),
+            ('retries', 'Reintentos por dominio'),
+            ('errors', 'Errores de conexión por dominio'),
+        ]
+        for field, help_text in host_series:
+            lines += [f"# HELP {p}_host_{field}_total {help_text}", f"# TYPE {p}_host_{field}_total counter"]
+            lines += [
+                f'{p}_host_{field}_total{{host="{domain}"}} {getattr(metrics, field)}'
+                for domain, metrics in sorted(self.hosts.items())
+            ]
+        lines += [f"# HELP {p}_host_responses_total Respuestas por dominio y código", f"# TYPE {p}_host_responses_total counter"]
+        for domain, metrics in sorted(self.hosts.items()):
+            lines += [
+                f'{p}_host_responses_total{{host="{domain}",status="{status}"}} {count}'
+                for status, count in sorted(metrics.statuses.items())
+            ]
+        lines.append(f"{p}_run_duration_seconds {time.time() - self.started:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_path, prometheus_path=None):
+        _write_atomic(json_path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+        if prometheus_path:
+            _write_atomic(prometheus_path, self.prometheus())
+
+    def slowest_stages(self, limit=5):
+        """Etapas ordenadas por tiempo total, para el resumen del log."""
+        return sorted(self.stages.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+
+def metrics_path(output_path):
+    """Ruta del resumen de métricas: `noticias.csv` -> `noticias.metrics.json`."""
+    return os.path.splitext(output_path)[0] + '.metrics.json'
+
+def _write_atomic(path, content):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,46 +1,75 @@
+"""Radar de noticias optimizado v4.
+
+Se usa como script (mismos argumentos y salida de siempre):
+
+    python3 radar_optimo.py --keywords '["Kicillof"]' --sources '["https://www.clarin.com"]'
+
+o como biblioteca, sin leer sys.argv ni tocar el logging al importarse:
+
+    from radar_optimo import Radar, RadarConfig
+    results = await Radar(RadarConfig(keywords=["Kicillof"], sources=["https://www.clarin.com"])).run()
+
+Los módulos pesados (aiohttp, bs4, newspaper, el pool de procesos) se
+importan recién cuando se usan.
+"""
 import asyncio
-import aiohttp
-from aiohttp import ClientSession, ClientTimeout
-from bs4 import BeautifulSoup
-from newspaper import Article
-import csv
+import functools
 from datetime import datetime, timedelta
 import argparse
 import json
 import os
-import re
+import sys
 from urllib.parse import urljoin, urlparse
+from collections import OrderedDict
 import logging
-import pickle
-from collections import defaultdict
 import random
+import time
+from radar_http_cache import HttpDiskCache
+from radar_seen_store import SeenUrlStore
+from radar_hosts import HostLimiter, load_host_state, parse_retry_after, save_host_state
+from radar_keywords import KeywordMatcher, KeywordProfiles
+from radar_urls import UrlClassifier, canonicalize_url, url_key
+from radar_sitemaps import SitemapReader
+from radar_feeds import cache_entry, cached_feeds, discover_feed_links, load_feed_cache, parse_feed, save_feed_cache
+from radar_parse import html_to_search_text, parse_article_html
+from radar_simhash import StreamingClusters, load_fingerprints, save_fingerprints
+from radar_results import ResultWriter, print_result, profile_slug
+from radar_replay import WarcWriter
+from radar_metrics import RunMetrics, metrics_path
+from radar_profile import LoopProfiler, profile_call
+from radar_logging import start_logging
 
-# Configuración de logging (MISMO QUE ORIGINAL)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('radar_optimo_v4.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FILE = 'radar_optimo_v4.log'
 
-# Configuración (MISMO FORMATO QUE ORIGINAL)
+def setup_logging(options=None):
+    """Configuración de logging de la CLI: mismo archivo y formato que el
+    original, escritos desde un hilo aparte (ver radar_logging.py)."""
+    options = options if options is not None else parser.parse_args([])
+    return start_logging(
+        LOG_FILE,
+        level=getattr(logging, options.log_level),
+        json_path=options.log_json,
+        max_bytes=int(options.log_max_mb * 1024 * 1024),
+        backups=options.log_backups
+    )
+
+# Configuración (fechas y salida por defecto: configure() las vuelve a fijar en cada corrida)
 TODAY = datetime.now().date()
 YESTERDAY = TODAY - timedelta(days=1)
 OUTPUT_PATH = 'noticias.csv'
-PROCESSED_URLS = set()
-DOMAIN_SEMAPHORES = defaultdict(asyncio.Semaphore, {k: asyncio.Semaphore(5) for k in []})
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Safari/605.1.15',
     'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36'
 ]
 
-# Argumentos (EXACTAMENTE IGUAL AL ORIGINAL)
+# Argumentos: los del radar original más los propios de esta versión. También
+# son los campos de RadarConfig y de los trabajos del modo --daemon.
 parser = argparse.ArgumentParser(description='Radar de noticias optimizado v4 compatible')
 parser.add_argument('--keywords', type=str, help='Lista de palabras clave (JSON)')
 parser.add_argument('--keywords-file', type=str, help='Archivo JSON con palabras clave')
+parser.add_argument('--profiles', type=str, help='Perfiles de palabras clave con nombre (JSON: {"perfil": ["palabra", ...]})')
+parser.add_argument('--profiles-file', type=str, help='Archivo JSON con perfiles de palabras clave')
 parser.add_argument('--sources', type=str, help='Lista de fuentes (JSON)')
 parser.add_argument('--sources-file', type=str, help='Archivo JSON con fuentes')
 parser.add_argument('--twitter-users', type=str, help='Usuarios de Twitter (JSON)')
@@ -49,217 +78,750 @@ parser.add_argument('--validate-links', action='store_true', help='Validar enlac
 parser.add_argument('--today-only', action='store_true', help='Solo noticias de hoy')
 parser.add_argument('--include-yesterday', action='store_true', help='Incluir noticias de ayer')
 parser.add_argument('--max-links-per-site', type=int, default=50, help='Máximo de enlaces por sitio')
+parser.add_argument('--max-concurrency', type=int, default=32, help='Máximo de solicitudes HTTP simultáneas en total')
+parser.add_argument('--max-per-host', type=int, default=4, help='Máximo de solicitudes HTTP simultáneas por dominio')
+parser.add_argument('--rate-per-host', type=float, default=2.0, help='Solicitudes por segundo por dominio (0 para sin límite)')
+parser.add_argument('--burst-per-host', type=int, default=2, help='Ráfaga máxima de solicitudes por dominio')
+parser.add_argument('--max-retries', type=int, default=2, help='Reintentos por URL ante 429/5xx')
+parser.add_argument('--html-cache-mb', type=int, default=64, help='Tamaño máximo del caché de HTML en memoria (MB)')
+parser.add_argument('--http-cache-dir', type=str, default='http_cache', help='Directorio del caché HTTP persistente')
+parser.add_argument('--http-cache-mb', type=int, default=256, help='Tamaño máximo del caché HTTP en disco (MB, 0 lo desactiva)')
+parser.add_argument('--http-cache-ttl', type=float, default=24, help='Horas que se conserva una entrada del caché HTTP')
+parser.add_argument('--seen-db', type=str, default='radar_seen.db', help='Base SQLite de URLs ya procesadas')
+parser.add_argument('--seen-ttl-days', type=float, default=30, help='Días que se recuerda una URL procesada')
+parser.add_argument('--retry-failed-after', type=float, default=30, help='Minutos antes de reintentar una URL fallida')
 parser.add_argument('--deep-scrape', action='store_true', help='Realizar scraping profundo')
+parser.add_argument('--max-sitemaps', type=int, default=20, help='Máximo de sitemaps hijos a recorrer por sitio')
+parser.add_argument('--feeds', action='store_true', help='Usar los feeds RSS/Atom de cada fuente en lugar de recorrer secciones')
+parser.add_argument('--no-dedup', action='store_true', help='No agrupar notas casi duplicadas entre medios')
+parser.add_argument('--dedup-days', type=float, default=3, help='Días que se recuerdan las notas para reconocer republicaciones (0 para no recordar)')
+parser.add_argument('--stream-results', action='store_true', help='Emitir cada resultado por stdout (líneas "RESULT {json}") apenas se encuentra')
+parser.add_argument('--metrics-prom', type=str, help='Guardar también las métricas de la corrida en formato de texto de Prometheus')
+parser.add_argument('--profile', action='store_true', help='Perfilar la corrida por muestreo (pilas collapsed y bloqueos del event loop junto al CSV)')
+parser.add_argument('--profile-interval-ms', type=float, default=10, help='Intervalo de muestreo de --profile (ms)')
+parser.add_argument('--block-threshold-ms', type=float, default=100, help='Bloqueo del event loop que --profile informa (ms)')
+parser.add_argument('--log-level', type=str, default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='Nivel de logging')
+parser.add_argument('--log-json', type=str, help='Escribir también el log en JSON lines en este archivo')
+parser.add_argument('--log-max-mb', type=float, default=20, help='Tamaño a partir del cual rotan los archivos de log (MB, 0 sin rotación)')
+parser.add_argument('--log-backups', type=int, default=3, help='Archivos de log rotados que se conservan')
+parser.add_argument('--record', type=str, help='Grabar las respuestas descargadas en un archivo WARC (ver radar_replay.py); desactiva el caché HTTP')
 parser.add_argument('--max-results', type=int, default=0, help='Máximo de resultados totales (0 para sin límite)')
-args = parser.parse_args()
+parser.add_argument('--word-boundary', action='store_true', help='Solo contar palabras clave como palabras completas')
+parser.add_argument('--accent-folding', action='store_true', help='Ignorar tildes al buscar palabras clave ("politica" = "política")')
+parser.add_argument('--no-prefilter', action='store_true', help='Parsear todas las páginas aunque el HTML no contenga palabras clave')
+parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1, help='Procesos para parsear HTML (0 para parsear en el proceso principal)')
+parser.add_argument('--daemon', action='store_true', help='Quedar en espera de trabajos JSON por stdin (uno por línea) con pools y cachés calientes')
+
+# Argumentos de la corrida en curso (los fija configure())
+args = None
 
-# Cargar palabras clave y fuentes (MISMO CÓDIGO)
+# Palabras clave y fuentes de la corrida; las completa configure(). Con
+# --profiles, KEYWORDS es la unión de los perfiles y PROFILES los reparte.
 KEYWORDS = []
+PROFILES = None
 NEWS_SOURCES = []
 TWITTER_USERS = []
 
-if args.keywords:
-    KEYWORDS = json.loads(args.keywords)
-elif args.keywords_file:
-    with open(args.keywords_file, 'r', encoding='utf-8') as f:
-        KEYWORDS = json.load(f)
-if args.sources:
-    NEWS_SOURCES = json.loads(args.sources)
-elif args.sources_file:
-    with open(args.sources_file, 'r', encoding='utf-8') as f:
-        NEWS_SOURCES = json.load(f)
-if args.twitter_users:
-    TWITTER_USERS = json.loads(args.twitter_users)
-if args.output:
-    OUTPUT_PATH = args.output
-
-# Validar entradas (MISMO CÓDIGO)
-if not KEYWORDS:
-    raise ValueError("Se requieren keywords")
-if not NEWS_SOURCES and not TWITTER_USERS:
-    raise ValueError("Se requieren fuentes o usuarios de Twitter")
-
-# Caché de resultados (MISMO CÓDIGO)
+def _json_list(value):
+    """Lista desde un argumento: texto JSON (CLI) o lista de Python (RadarConfig)."""
+    return json.loads(value) if isinstance(value, str) else list(value)
+
+def load_profiles(options):
+    """Perfiles de --profiles / --profiles-file, o None si no se pidieron.
+
+    Con perfiles no se aceptan --keywords / --keywords-file (las palabras
+    salen de los perfiles) ni dos perfiles con el mismo nombre de archivo
+    (ver profile_slug).
+    """
+    profiles = options.profiles
+    if isinstance(profiles, str):
+        profiles = json.loads(profiles)
+    elif not profiles and options.profiles_file:
+        with open(options.profiles_file, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    if not profiles:
+        return None
+    if options.keywords or options.keywords_file:
+        raise ValueError("--keywords / --keywords-file no se combinan con --profiles: las palabras clave salen de los perfiles")
+    slugs = {}
+    for name in profiles:
+        other = slugs.setdefault(profile_slug(name), name)
+        if other != name:
+            raise ValueError(f"Los perfiles {other!r} y {name!r} generan el mismo archivo ({profile_slug(name)})")
+    return dict(profiles)
+
+def load_inputs(options):
+    """Carga y valida palabras clave (o perfiles), fuentes y usuarios de Twitter."""
+    keywords = []
+    sources = []
+    twitter_users = []
+    profiles = load_profiles(options)
+    if profiles:
+        keywords = list(dict.fromkeys(keyword for words in profiles.values() for keyword in words))
+    elif options.keywords:
+        keywords = _json_list(options.keywords)
+    elif options.keywords_file:
+        with open(options.keywords_file, 'r', encoding='utf-8') as f:
+            keywords = json.load(f)
+    if options.sources:
+        sources = _json_list(options.sources)
+    elif options.sources_file:
+        with open(options.sources_file, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+    if options.twitter_users:
+        twitter_users = _json_list(options.twitter_users)
+
+    # Validar entradas (mismos mensajes que el original)
+    if not keywords:
+        raise ValueError("Se requieren keywords")
+    if not sources and not twitter_users:
+        raise ValueError("Se requieren fuentes o usuarios de Twitter")
+    return keywords, profiles, sources, twitter_users
+
+# URLs ya procesadas (SQLite); se migra una vez el antiguo radar_cache.pkl
 CACHE_FILE = 'radar_cache.pkl'
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, 'rb') as f:
-        PROCESSED_URLS.update(pickle.load(f))
+SEEN_URLS = None
+
+# Fuentes: cada entrada puede ser una URL o un objeto con ajustes por dominio
+# {"url": "https://www.clarin.com", "max_per_host": 2, "rate": 1.0, "burst": 2}
+HOST_SETTINGS = {}
+
+def split_sources(sources):
+    """Separa la lista de fuentes en URLs y ajustes por dominio."""
+    urls = []
+    settings = {}
+    for source in sources:
+        if isinstance(source, dict):
+            urls.append(source['url'])
+            settings[urlparse(source['url']).netloc] = source
+        else:
+            urls.append(source)
+    return urls, settings
+
+# Límites de concurrencia y de tasa (global y por dominio). El estado AIMD
+# se persiste para que cada dominio arranque con su última tasa buena.
+GLOBAL_SEMAPHORE = None
+HOST_LIMITERS = {}
+HOST_STATE_FILE = 'radar_hosts_state.json'
+HOST_STATE = None
+
+def get_host_limiter(domain):
+    """Devuelve el limitador del dominio, creándolo con sus ajustes si hace falta."""
+    if domain not in HOST_LIMITERS:
+        settings = HOST_SETTINGS.get(domain, {})
+        HOST_LIMITERS[domain] = HostLimiter(
+            settings.get('max_per_host', args.max_per_host),
+            settings.get('rate', args.rate_per_host),
+            settings.get('burst', args.burst_per_host),
+            GLOBAL_SEMAPHORE,
+            HOST_STATE.get(domain, {}).get('rate')
+        )
+    return HOST_LIMITERS[domain]
+
+# Relevancia por palabras clave y clasificación de URLs
+KEYWORD_MATCHER = None
 
-# FUNCIONES MANTENIDAS DEL ORIGINAL (sin cambios)
 def is_relevant(text, title=""):
     """Verifica si el texto o título contiene palabras clave."""
-    score = 0
-    text_lower = (text + " " + title).lower()
-    for keyword in KEYWORDS:
-        if keyword.lower() in text_lower:
-            score += 1
-    return score > 0, score
-
-def extract_date_from_html(soup):
-    """Extrae la fecha desde el HTML."""
-    try:
-        date_tags = soup.find_all(['time', 'meta'], {
-            'property': ['article:published_time', 'og:published_time', 'datePublished'],
-            'name': ['pubdate', 'dc.date']
-        })
-        for tag in date_tags:
-            date_str = tag.get('datetime') or tag.get('content') or tag.get_text()
-            if date_str:
-                try:
-                    return datetime.fromisoformat(date_str.replace('Z', '+00:00')).date()
-                except ValueError:
-                    try:
-                        return datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        continue
-        date_patterns = [
-            r'\b(\d{4}-\d{2}-\d{2})\b',
-            r'\b(\d{1,2}/\d{1,2}/\d{4})\b',
-            r'\b(\d{1,2}-\d{1,2}-\d{4})\b',
-            r'publicado\s+el\s+(\d{1,2}/\d{1,2}/\d{4})'
-        ]
-        text = soup.get_text()[:2000]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    date_str = match.group(1)
-                    if '-' in date_str and len(date_str.split('-')[0]) == 4:
-                        return datetime.strptime(date_str, '%Y-%m-%d').date()
-                    elif '/' in date_str:
-                        return datetime.strptime(date_str, '%d/%m/%Y').date()
-                    elif '-' in date_str:
-                        return datetime.strptime(date_str, '%d-%m-%Y').date()
-                except ValueError:
-                    continue
-    except Exception as e:
-        logging.warning(f"Error extrayendo fecha del HTML: {e}")
-    return None
+    is_rel, score, _ = KEYWORD_MATCHER.match(text, title)
+    return is_rel, score
+
+# Clasificador de URLs: uno por defecto y uno por cada fuente con patrones propios
+# ("article_patterns" / "non_article_patterns" en sources.json). Los resultados
+# se memorizan durante la corrida: el mismo enlace aparece en portada,
+# secciones, deep scrape y sitemaps.
+DEFAULT_URL_CLASSIFIER = UrlClassifier()
+URL_CLASSIFIERS = {}
+ARTICLE_URL_MEMO = {}
+
+def build_url_classifiers(host_settings):
+    return {
+        domain: UrlClassifier(settings.get('article_patterns', ()), settings.get('non_article_patterns', ()))
+        for domain, settings in host_settings.items()
+        if settings.get('article_patterns') or settings.get('non_article_patterns')
+    }
 
 def is_article_url(url):
     """Filtra URLs que probablemente sean artículos."""
-    article_patterns = [
-        r'/noticia', r'/article', r'/\d{4}/\d{2}/\d{2}', r'/politica', r'/economia',
-        r'/sociedad', r'/noticias', r'-[0-9]+$', r'\.html$',
-        r'/[a-z0-9-]+/\d+$', r'/[a-z0-9-]+/[a-z0-9-]+$', r'/[a-z0-9-]+$'
-    ]
-    non_article_patterns = [
-        r'/login/', r'\.pdf$', r'/tag/', r'/category/', r'/search/',
-        r'twitter\.com', r'x\.com', r't\.co', r'bitly\.ws', r'facebook\.com',
-        r'instagram\.com', r'youtube\.com', r'whatsapp\.com'
-    ]
-    parsed_url = urlparse(url)
-    return (
-        parsed_url.scheme in ['http', 'https'] and
-        any(re.search(pattern, parsed_url.path, re.IGNORECASE) for pattern in article_patterns) and
-        not any(re.search(pattern, url, re.IGNORECASE) for pattern in non_article_patterns)
-    )
+    result = ARTICLE_URL_MEMO.get(url)
+    if result is None:
+        parsed_url = urlparse(url)
+        classifier = URL_CLASSIFIERS.get(parsed_url.netloc, DEFAULT_URL_CLASSIFIER)
+        result = classifier.is_article(parsed_url, url)
+        ARTICLE_URL_MEMO[url] = result
+    return result
+
+# Métricas por etapa y por dominio de la corrida (ver radar_metrics.py)
+METRICS = RunMetrics()
+
+def timed_stage(stage):
+    """Mide cada llamada de la corrutina decorada en el histograma `stage` de METRICS."""
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with METRICS.timer(stage):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Deduplicación antes de programar descargas: las variantes de una misma nota
+# (utm_*, fbclid, #fragmento, AMP, barra final, http/https) comparten clave, y
+# los alias conocidos por <link rel="canonical"> se resuelven desde el registro.
+SCHEDULED_KEYS = {}
+DEDUP_STATS = {"variants": 0, "aliases": 0, "canonical": 0, "canonical_ignored": 0}
+
+# Claves de las portadas y secciones descubiertas en la corrida: un
+# rel=canonical que apunta a una de ellas no identifica a la nota.
+SECTION_KEYWORDS = ['politica', 'economia', 'deportes', 'sociedad', 'cultura', 'tecnologia']
+SECTION_KEYS = set()
+
+def canonical_key(article_url, canonical_url, source_url):
+    """Clave de la URL canónica declarada por una nota, o None si no es confiable.
+
+    Algunos CMS apuntan el canonical de todas las notas a la portada o a una
+    sección; solo se acepta si es del mismo dominio, parece un artículo y no
+    es la raíz del sitio, la fuente ni una sección.
+    """
+    canonical = canonicalize_url(urljoin(article_url, canonical_url))
+    parsed = urlparse(canonical)
+    if parsed.netloc != urlparse(article_url).netloc or not is_article_url(canonical):
+        return None
+    key = url_key(canonical)
+    path = urlparse(key).path
+    if path == '/' or path.strip('/').lower() in SECTION_KEYWORDS:
+        return None
+    if key in SECTION_KEYS or key == url_key(canonicalize_url(source_url)):
+        return None
+    return key
+
+async def dedupe_links(links, limit):
+    """Canonicaliza los enlaces y devuelve hasta `limit` pares (clave, url) sin
+    repetidos en toda la corrida.
 
+    Los alias de todos los enlaces del sitio se resuelven en una sola consulta,
+    fuera del event loop.
+    """
+    canonicalized = []
+    for link in links:
+        url = canonicalize_url(link)
+        canonicalized.append((link, url, url_key(url)))
+    aliases = await asyncio.to_thread(SEEN_URLS.resolve_aliases, {key for _, _, key in canonicalized})
+    unique = []
+    for link, url, key in canonicalized:
+        canonical = aliases.get(key, key)
+        if canonical != key:
+            DEDUP_STATS["aliases"] += 1
+            key = canonical
+        if key in SCHEDULED_KEYS:
+            # El mismo enlace literal ya lo frenaba SEEN_URLS; solo se cuentan variantes
+            if SCHEDULED_KEYS[key] != link:
+                DEDUP_STATS["variants"] += 1
+            continue
+        if len(unique) >= limit:
+            break
+        SCHEDULED_KEYS[key] = link
+        unique.append((key, url))
+    return unique
+
+@timed_stage('validation')
 async def validate_link(session, url):
-    """Valida si un enlace es accesible."""
-    try:
-        headers = {'User-Agent': random.choice(USER_AGENTS)}
-        async with session.head(url, headers=headers, timeout=5, allow_redirects=True) as response:
-            return response.status == 200
-    except Exception:
-        return False
+    """Valida si un enlace es accesible.
+
+    Se usa un GET a través del caché de HTML en lugar de un HEAD: el cuerpo
+    descargado queda disponible para el parseo y la URL no se pide dos veces.
+    """
+    return await fetch_html(session, url, urlparse(url).netloc) is not None
+
+# Pool de conexiones compartido por todas las solicitudes HTTP de la corrida
+DNS_CACHE_TTL = 300      # segundos que se reutiliza una resolución DNS
+KEEPALIVE_TIMEOUT = 30   # segundos que una conexión ociosa queda abierta
+POOL_STATS = {"opened": 0, "reused": 0, "dns_cache_hits": 0, "dns_cache_misses": 0}
+
+def create_pool_trace_config():
+    """TraceConfig que cuenta conexiones abiertas/reutilizadas y uso del caché DNS."""
+    from aiohttp import TraceConfig
+
+    def counter(key):
+        async def on_event(session, context, params):
+            POOL_STATS[key] += 1
+        return on_event
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_create_end.append(counter("opened"))
+    trace_config.on_connection_reuseconn.append(counter("reused"))
+    trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+    trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+    return trace_config
+
+def create_session():
+    """Crea la sesión HTTP única de la corrida con un TCPConnector ajustado."""
+    from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+    per_host = max([args.max_per_host] + [
+        settings.get('max_per_host', 0) for settings in HOST_SETTINGS.values()
+    ])
+    connector = TCPConnector(
+        limit=args.max_concurrency,
+        limit_per_host=per_host,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    return ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(total=60),
+        trace_configs=[create_pool_trace_config()]
+    )
+
+class HtmlCache:
+    """Caché LRU en memoria del HTML descargado durante la corrida.
+
+    Lo comparten secciones, deep scrape, validación y parseo, así cada URL se
+    descarga a lo sumo una vez. El tamaño se acota por cantidad de caracteres.
+    Las descargas en curso se comparten: un segundo pedido de la misma URL
+    espera al primero en lugar de salir a la red.
+    """
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.size = 0
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url):
+        """Clave de la URL canonicalizada (la misma que SEEN_URLS): los enlaces
+        con parámetros de seguimiento, fragmento o variante AMP comparten la
+        entrada con la URL limpia que después descarga process_article."""
+        return url_key(canonicalize_url(url))
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+        return html
+
+    def put(self, key, html):
+        if len(html) > self.max_chars:
+            return
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = html
+        self.size += len(html)
+        while self.size > self.max_chars:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+HTML_CACHE = None
+HTTP_CACHE = None
+RECORDER = None
 
 async def fetch_html(session, url, domain):
-    """Obtiene el HTML de una URL con control de tasa."""
-    async with DOMAIN_SEMAPHORES[domain]:
+    """Obtiene el HTML de una URL, pasando primero por el caché de la corrida."""
+    key = HtmlCache.key(url)
+    html = HTML_CACHE.get(key)
+    if html is not None:
+        HTML_CACHE.hits += 1
+        return html
+    if key in HTML_CACHE.pending:
+        HTML_CACHE.hits += 1
+        return await asyncio.shield(HTML_CACHE.pending[key])
+
+    HTML_CACHE.misses += 1
+    task = asyncio.ensure_future(download_and_cache(session, url, domain, key))
+    HTML_CACHE.pending[key] = task
+    task.add_done_callback(lambda _: HTML_CACHE.pending.pop(key, None))
+    return await asyncio.shield(task)
+
+async def cancel_pending_downloads():
+    """Cancela las descargas compartidas que siguen en curso al terminar una
+    corrida: en el daemon, si no, terminarían guardándose en el HTML_CACHE y
+    las métricas del trabajo siguiente."""
+    pending = list(HTML_CACHE.pending.values())
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+async def download_and_cache(session, url, domain, key):
+    html = await download_html(session, url, domain)
+    if html is not None:
+        HTML_CACHE.put(key, html)
+    return html
+
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+async def read_text(response):
+    return await response.text()
+
+async def download_html(session, url, domain):
+    """Descarga el HTML de una URL (ver download)."""
+    return await download(session, url, domain, read_text)
+
+async def download(session, url, domain, read_body):
+    """Descarga una URL con control de tasa adaptativo.
+
+    `read_body(response)` lee el cuerpo de una respuesta 200 (texto completo
+    o por bloques). Ante 429/503 se reduce la tasa del dominio, se respeta
+    Retry-After y la URL se vuelve a encolar en el limitador (hasta
+    --max-retries veces); ante 500/502/504 también se reduce la tasa y el
+    reintento espera 1, 2, 4... segundos (hasta MAX_BACKOFF). Si hay una copia en el caché HTTP se pide de forma
+    condicional y un 304 reutiliza el cuerpo guardado; el caché se lee y se
+    escribe en un hilo, fuera del event loop y sin ocupar el turno del dominio.
+    """
+    limiter = get_host_limiter(domain)
+    cached = await asyncio.to_thread(HTTP_CACHE.get, url) if HTTP_CACHE.enabled else None
+    for attempt in range(args.max_retries + 1):
         try:
-            headers = {'User-Agent': random.choice(USER_AGENTS)}
-            await asyncio.sleep(0.5)
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    return await response.text()
-                elif response.status == 429:
-                    logging.warning(f"429 Too Many Requests para {url}, esperando 5s")
-                    await asyncio.sleep(5)
-                    return None
-                elif response.status == 403:
-                    logging.warning(f"403 Forbidden para {url}, omitiendo")
-                    return None
-                else:
-                    logging.debug(f"Error {response.status} para {url}")
-                    return None
+            headers = {'User-Agent': random.choice(USER_AGENTS), **HTTP_CACHE.conditional_headers(cached)}
+            async with limiter.slot():
+                async with session.get(url, headers=headers, timeout=10) as response:
+                    status = response.status
+                    if status == 200:
+                        body = await read_body(response)
+                        METRICS.response(domain, status, response.content.total_bytes)
+                        limiter.on_success()
+                        response_headers = response.headers
+                        if RECORDER is not None:
+                            raw = body if isinstance(body, bytes) else await response.read()
+                            RECORDER.record(url, status, response.reason, response.headers, raw)
+                    else:
+                        METRICS.response(domain, status, 0)
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if status == 200:
+                if HTTP_CACHE.enabled:
+                    await asyncio.to_thread(HTTP_CACHE.store, url, response_headers, body)
+                return body
+            if status == 304 and cached:
+                limiter.on_success()
+                return await asyncio.to_thread(HTTP_CACHE.revalidate, url, cached)
         except Exception as e:
-            logging.debug(f"Error fetching {url}: {e}")
+            METRICS.host(domain).errors += 1
+            logging.debug("Error fetching %s: %s", url, e)
             return None
 
-async def process_article(session, url, source_url):
-    """Procesa un artículo y devuelve datos si es relevante."""
-    if url in PROCESSED_URLS:
-        return None
-    PROCESSED_URLS.add(url)
+        if status in THROTTLE_STATUSES:
+            backoff = limiter.on_throttle(retry_after)
+            logging.warning(
+                "%s para %s, tasa de %s reducida a %.2f req/s, pausa %.0fs (intento %s/%s)",
+                status, url, domain, limiter.rate, backoff, attempt + 1, args.max_retries + 1
+            )
+        elif status in RETRY_STATUSES:
+            backoff = limiter.on_server_error(attempt)
+            if attempt < args.max_retries:
+                logging.warning(
+                    "%s para %s, tasa de %s reducida a %.2f req/s, reintento en %.0fs (intento %s/%s)",
+                    status, url, domain, limiter.rate, backoff, attempt + 1, args.max_retries + 1
+                )
+                await asyncio.sleep(backoff)
+        elif status == 403:
+            logging.warning("403 Forbidden para %s, omitiendo", url)
+            return None
+        else:
+            logging.debug("Error %s para %s", status, url)
+        if status not in RETRY_STATUSES:
+            return None
+        if attempt < args.max_retries:
+            METRICS.host(domain).retries += 1
+    logging.warning("Se agotaron los reintentos para %s", url)
+    return None
 
+class ParseStage:
+    """Etapa de parseo: cola acotada alimentada por las descargas y
+    consumida por tareas que delegan el trabajo de CPU a un ProcessPoolExecutor."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = None
+        if workers > 0:
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.queue = asyncio.Queue(maxsize=max(1, workers) * 2)
+        self.tasks = []
+
+    def start(self):
+        for _ in range(max(1, self.workers)):
+            self.tasks.append(asyncio.create_task(self._consume()))
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            url, html, future = await self.queue.get()
+            try:
+                if self.executor and PROFILER is not None:
+                    parsed, samples = await loop.run_in_executor(
+                        self.executor, profile_call, PROFILER.interval, parse_article_html, url, html
+                    )
+                    PROFILER.add_worker_samples(samples)
+                elif self.executor:
+                    parsed = await loop.run_in_executor(self.executor, parse_article_html, url, html)
+                else:
+                    parsed = parse_article_html(url, html)
+                if not future.done():
+                    future.set_result(parsed)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def parse(self, url, html):
+        """Encola el HTML y espera el resultado (bloquea si la cola está llena)."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((url, html, future))
+        return await future
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor:
+            self.executor.shutdown()
+
+PARSE_STAGE = None
+PROFILER = None
+PREFILTER_STATS = {"checked": 0, "rejected": 0, "cpu": 0.0, "parsed": 0, "parse_cpu": 0.0}
+
+def passes_prefilter(html):
+    """Prefiltro sobre el HTML crudo: descarta páginas sin ninguna palabra clave
+    antes de armar el DOM o mandarlas a la etapa de parseo."""
+    started = time.process_time()
+    found = KEYWORD_MATCHER.contains_any(html_to_search_text(html))
+    PREFILTER_STATS["cpu"] += time.process_time() - started
+    PREFILTER_STATS["checked"] += 1
+    if not found:
+        PREFILTER_STATS["rejected"] += 1
+    return found
+
+async def claim_url(key, claims):
+    """Reserva `key` en SEEN_URLS desde un hilo y anota el claim en `claims`.
+
+    El claim se protege con shield: si la tarea se cancela mientras corre, el
+    hilo termina igual y release_claims puede liberar lo que haya reservado.
+    """
+    claim = asyncio.ensure_future(asyncio.to_thread(SEEN_URLS.claim, key))
+    claims.append((key, claim))
+    return await asyncio.shield(claim)
+
+def release_claims(claims):
+    """Libera en un hilo las reservas de una tarea cancelada, sin esperar.
+
+    Cada una se libera cuando su claim termina y solo si lo obtuvo; release no
+    toca las URLs que ya pasaron a hecha o fallida.
+    """
+    store = SEEN_URLS
+    for key, claim in claims:
+        def release(claim, key=key):
+            if not claim.cancelled() and claim.exception() is None and claim.result():
+                claim.get_loop().run_in_executor(None, store.release, key)
+        claim.add_done_callback(release)
+
+@timed_stage('article')
+async def process_article(session, url, source_url, key):
+    """Procesa un artículo y devuelve datos si es relevante.
+
+    `key` es la clave canónica de la URL (ver dedupe_links) con la que se
+    registra en SEEN_URLS. Las consultas a SEEN_URLS pueden esperar el lock de
+    SQLite, por eso van en un hilo.
+    """
+    claims = []
     try:
-        article = Article(url, request_timeout=15)
-        article.download()
-        article.parse()
-        soup = BeautifulSoup(article.html, 'html.parser')
+        if not await claim_url(key, claims):
+            METRICS.count('articles_already_seen')
+            return None
+
+        # Descarga por la sesión compartida (respeta semáforos por dominio);
+        # el parseo se hace en la etapa de procesos.
+        with METRICS.timer('download'):
+            html = await fetch_html(session, url, urlparse(url).netloc)
+        if not html:
+            logging.debug("Artículo descartado %s: no se pudo descargar", url)
+            METRICS.count('articles_failed_download')
+            await asyncio.to_thread(SEEN_URLS.mark_failed, key)
+            return None
+        if not args.no_prefilter:
+            with METRICS.timer('prefilter'):
+                found = passes_prefilter(html)
+            if not found:
+                logging.debug("Artículo descartado %s: sin palabras clave en el HTML", url)
+                METRICS.count('articles_prefiltered')
+                await asyncio.to_thread(SEEN_URLS.mark_done, key)
+                return None
+        with METRICS.timer('parse'):
+            article = await PARSE_STAGE.parse(url, html)
+        await asyncio.to_thread(SEEN_URLS.mark_done, key)
+        PREFILTER_STATS["parsed"] += 1
+        PREFILTER_STATS["parse_cpu"] += article["parse_cpu"]
+        METRICS.observe('parse_cpu', article["parse_cpu"])
+        METRICS.observe('date', article["date_cpu"])
 
-        publish_date = article.publish_date.date() if article.publish_date else extract_date_from_html(soup)
+        # <link rel="canonical"> distinto: se registra el alias para las próximas
+        # corridas y, si la nota canónica ya se procesó, esta es un duplicado.
+        if article["canonical_url"]:
+            canonical = canonical_key(url, article["canonical_url"], source_url)
+            if canonical is None:
+                DEDUP_STATS["canonical_ignored"] += 1
+                METRICS.count('canonical_ignored')
+                logging.debug("Canonical ignorado en %s: %s", url, article["canonical_url"])
+            elif canonical != key:
+                await asyncio.to_thread(SEEN_URLS.add_alias, key, canonical)
+                if canonical in SCHEDULED_KEYS or not await claim_url(canonical, claims):
+                    DEDUP_STATS["canonical"] += 1
+                    METRICS.count('articles_canonical_duplicate')
+                    logging.debug("Artículo descartado %s: duplicado de %s", url, canonical)
+                    return None
+                SCHEDULED_KEYS[canonical] = article["canonical_url"]
+                await asyncio.to_thread(SEEN_URLS.mark_done, canonical)
+
+        publish_date = article["publish_date"]
         if not publish_date:
-            logging.debug(f"No se pudo extraer fecha para {url}, usando fecha actual")
+            logging.debug("No se pudo extraer fecha para %s, usando fecha actual", url)
             publish_date = TODAY
 
         if args.today_only and publish_date != TODAY and (not args.include_yesterday or publish_date != YESTERDAY):
-            logging.debug(f"Artículo descartado {url}: fecha {publish_date} no es de hoy ni de ayer")
+            logging.debug("Artículo descartado %s: fecha %s no es de hoy ni de ayer", url, publish_date)
+            METRICS.count('articles_out_of_date')
             return None
 
-        is_rel, score = is_relevant(article.text, article.title)
+        # Con perfiles, una sola pasada sobre el texto sirve a todos; el puntaje
+        # general es el del perfil con más coincidencias.
+        with METRICS.timer('keywords'):
+            if PROFILES is not None:
+                matched = PROFILES.match(article["text"], article["title"])
+                is_rel = bool(matched)
+                score = max((profile_score for profile_score, _ in matched.values()), default=0)
+                hits = {name: profile_hits for name, (_, profile_hits) in matched.items()}
+            else:
+                is_rel, score, hits = KEYWORD_MATCHER.match(article["text"], article["title"])
         if is_rel:
-            return {
-                "title": article.title or "Sin título",
+            logging.debug("Palabras clave en %s: %s", url, hits)
+            result = {
+                "title": article["title"] or "Sin título",
                 "date": publish_date,
                 "url": url,
-                "description": article.text[:300].replace('\n', ' ').strip(),
+                "description": article["text"][:300].replace('\n', ' ').strip(),
                 "source": source_url,
-                "relevance_score": score
+                "relevance_score": score,
+                "fingerprint": article["fingerprint"]
             }
+            if PROFILES is not None:
+                result["profiles"] = {name: profile_score for name, (profile_score, _) in matched.items()}
+            return result
         else:
-            logging.debug(f"Artículo descartado {url}: no relevante")
+            logging.debug("Artículo descartado %s: no relevante", url)
+            METRICS.count('articles_not_relevant')
+    except asyncio.CancelledError:
+        release_claims(claims)
+        raise
     except Exception as e:
-        logging.error(f"Error procesando {url}: {e}")
+        logging.error("Error procesando %s: %s", url, e)
+        METRICS.count('articles_failed_parse')
+        await asyncio.to_thread(SEEN_URLS.mark_failed, key)
     return None
 
-# NUEVAS FUNCIONES MEJORADAS (sin paginación compleja)
+# Recorrido de cada sitio: sitemaps, feeds, secciones y deep scrape
+SITEMAP_CHUNK_SIZE = 64 * 1024
+
+def allowed_dates():
+    """Fechas aceptadas según --today-only / --include-yesterday (None = todas)."""
+    if not args.today_only:
+        return None
+    return {TODAY, YESTERDAY} if args.include_yesterday else {TODAY}
+
+async def fetch_sitemap(session, url, domain):
+    """Descarga un sitemap y lo parsea a medida que llegan los bloques.
+
+    Devuelve la lista de SitemapEntry o None si no se pudo obtener.
+    """
+    reader = SitemapReader()
+
+    async def stream(response):
+        # Solo se acumula el cuerpo si se va a guardar en el caché HTTP o grabar
+        keep = RECORDER is not None or (
+            HTTP_CACHE.enabled and ('ETag' in response.headers or 'Last-Modified' in response.headers)
+        )
+        raw = bytearray()
+        async for chunk in response.content.iter_chunked(SITEMAP_CHUNK_SIZE):
+            reader.feed(chunk)
+            if keep:
+                raw += chunk
+        return bytes(raw) if keep else b''
+
+    body = await download(session, url, domain, stream)
+    if body is None:
+        return None
+    if not reader.started and body:
+        reader.feed(body)  # 304: cuerpo tomado del caché HTTP
+    entries = reader.close()
+    if reader.error:
+        logging.debug("Sitemap inválido %s: %s", url, reader.error)
+    return entries
+
+@timed_stage('sitemaps')
 async def get_sitemap_urls(session, base_url):
-    """Obtiene URLs desde sitemaps (MEJORA NUEVA)."""
+    """Obtiene URLs de artículos desde los sitemaps del sitio.
+
+    Los candidatos se piden en paralelo; los índices se recorren de forma
+    recursiva (hasta --max-sitemaps hijos, los más recientes primero) y con
+    --today-only las URLs y sitemaps con fecha fuera de rango se descartan
+    antes de descargar ningún artículo.
+    """
     sitemap_urls = [
         f"{base_url}/sitemap.xml",
         f"{base_url}/sitemap_index.xml",
         f"{base_url}/sitemap-news.xml",
     ]
-    
+    domain = urlparse(base_url).netloc
+    dates = allowed_dates()
+    earliest = min(dates) if dates else None
+    visited = set(sitemap_urls)
     all_urls = set()
-    for sitemap_url in sitemap_urls:
-        try:
-            headers = {'User-Agent': random.choice(USER_AGENTS)}
-            async with session.get(sitemap_url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    # Extraer URLs simples del sitemap
-                    urls = re.findall(r'<loc>(https?://[^<]+)</loc>', content)
-                    for url in urls:
-                        if is_article_url(url):
-                            all_urls.add(url)
-        except Exception as e:
-            logging.debug(f"Error accediendo a sitemap {sitemap_url}: {e}")
-    
+    dropped = 0
+    remaining = args.max_sitemaps
+    pending = sitemap_urls
+    while pending:
+        results = await asyncio.gather(*(fetch_sitemap(session, url, domain) for url in pending))
+        children = []
+        for sitemap_url, entries in zip(pending, results):
+            if not entries:
+                logging.debug("Sin sitemap en %s", sitemap_url)
+                continue
+            for entry in entries:
+                if entry.kind == 'sitemap':
+                    if entry.loc in visited or (earliest and entry.date and entry.date < earliest):
+                        continue
+                    visited.add(entry.loc)
+                    children.append(entry)
+                elif dates and entry.date and entry.date not in dates:
+                    dropped += 1
+                elif is_article_url(entry.loc):
+                    all_urls.add(entry.loc)
+        # Los hijos más recientes primero; sin fecha al final
+        children.sort(key=lambda entry: entry.date or datetime.min.date(), reverse=True)
+        pending = [entry.loc for entry in children[:max(0, remaining)]]
+        remaining -= len(pending)
+
+    if dropped:
+        logging.info("Sitemaps de %s: %s URLs descartadas por fecha", base_url, dropped)
     return list(all_urls)
 
+@timed_stage('sections')
 async def discover_sections(session, homepage_url):
-    """Descubre secciones automáticamente (MEJORA NUEVA)."""
+    """Descubre secciones automáticamente (MEJORA NUEVA).
+
+    De paso registra los feeds RSS/Atom anunciados en la portada.
+    """
     domain = urlparse(homepage_url).netloc
     html = await fetch_html(session, homepage_url, domain)
     if not html:
         return []
     
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
-    section_keywords = ['politica', 'economia', 'deportes', 'sociedad', 'cultura', 'tecnologia']
-    
+    FEED_CACHE[homepage_url] = cache_entry(discover_feed_links(soup, homepage_url))
     section_links = set()
     section_links.add(homepage_url)  # Incluir página principal
     
@@ -271,134 +833,580 @@ async def discover_sections(session, homepage_url):
             link_url = urljoin(homepage_url, link_url)
         
         # Verificar si es enlace a sección
-        if any(keyword in link_text or keyword in link_url for keyword in section_keywords):
-            if is_article_url(link_url) or any(kw in link_url for kw in section_keywords):
+        if any(keyword in link_text or keyword in link_url for keyword in SECTION_KEYWORDS):
+            if is_article_url(link_url) or any(kw in link_url for kw in SECTION_KEYWORDS):
                 section_links.add(link_url)
     
+    SECTION_KEYS.update(url_key(canonicalize_url(link)) for link in section_links)
     return list(section_links)
 
+def extract_article_links(html, base_url):
+    """Devuelve los enlaces a artículos presentes en un HTML."""
+    links = set()
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for a in soup.find_all('a', href=True):
+        link = a['href']
+        if not link.startswith('http'):
+            link = urljoin(base_url, link)
+        if link.startswith('http') and is_article_url(link):
+            links.add(link)
+    return links
+
+@timed_stage('section_pages')
+async def fetch_article_links(session, url, base_url, domain):
+    """Descarga una página y extrae sus enlaces a artículos."""
+    html = await fetch_html(session, url, domain)
+    if not html:
+        return set()
+    return extract_article_links(html, base_url)
+
+# Huellas SimHash de las notas de corridas anteriores (ver --dedup-days)
+FINGERPRINTS_FILE = 'radar_fingerprints.json'
+
+# Feeds RSS/Atom descubiertos por fuente (se vuelven a descubrir a los 7 días)
+FEED_CACHE_FILE = 'radar_feeds.json'
+FEED_CACHE_MAX_AGE = 7 * 86400
+FEED_CACHE = None
+
+@timed_stage('feeds')
+async def collect_feed_links(session, source_url, feeds):
+    """Enlaces candidatos desde los feeds: solo ítems relevantes por título y
+    resumen (y dentro del rango de fechas). Devuelve None si ningún feed respondió."""
+    contents = await asyncio.gather(*(fetch_html(session, feed_url, urlparse(feed_url).netloc) for feed_url in feeds))
+    if not any(contents):
+        return None
+    dates = allowed_dates()
+    links = []
+    total = 0
+    for feed_url, content in zip(feeds, contents):
+        if not content:
+            continue
+        for item in parse_feed(content, feed_url):
+            total += 1
+            if dates and item.date and item.date not in dates:
+                continue
+            if not is_relevant(html_to_search_text(item.summary), item.title)[0]:
+                continue
+            if item.link not in links:
+                links.append(item.link)
+    logging.info("Feeds de %s: %s candidatos de %s ítems en %s feeds", source_url, len(links), total, len(feeds))
+    return links
+
+async def collect_crawl_links(session, source_url, all_sections=None):
+    """Enlaces desde secciones, deep scrape y sitemaps."""
+    domain = urlparse(source_url).netloc
+    # 1 y 2. Secciones y sitemaps en paralelo
+    if all_sections is None:
+        all_sections, sitemap_urls = await asyncio.gather(
+            discover_sections(session, source_url),
+            get_sitemap_urls(session, source_url)
+        )
+    else:
+        sitemap_urls = await get_sitemap_urls(session, source_url)
+    logging.info("Encontradas %s secciones en %s", len(all_sections), source_url)
+    logging.info("Encontradas %s URLs en sitemap de %s", len(sitemap_urls), source_url)
+    
+    # 3. Raspar todas las secciones en paralelo (acotado por el limitador)
+    all_links = set()
+    for section_links in await asyncio.gather(*(
+        fetch_article_links(session, section_url, section_url, domain)
+        for section_url in all_sections
+    )):
+        all_links.update(section_links)
+
+    # Deep scraping opcional: seguir los primeros 15 enlaces distintos. Se
+    # canonicalizan antes de cortar para que las variantes con parámetros de
+    # seguimiento no gasten el cupo, y se ordenan para que la selección sea la
+    # misma en cada corrida.
+    if args.deep_scrape:
+        unique_links = {}
+        for link in all_links:
+            url = canonicalize_url(link)
+            unique_links.setdefault(url_key(url), url)
+        for secondary_links in await asyncio.gather(*(
+            fetch_article_links(session, unique_links[key], source_url, domain)
+            for key in sorted(unique_links)[:15]
+        )):
+            all_links.update(secondary_links)
+
+    # 4. Agregar URLs de sitemaps
+    all_links.update(sitemap_urls)
+    return all_links
+
+@timed_stage('site')
 async def scrape_site(session, source_url):
     """Recolecta y procesa artículos de un sitio (MEJORADA)."""
     domain = urlparse(source_url).netloc
     try:
-        # 1. Obtener secciones automáticamente (MEJORA)
-        all_sections = await discover_sections(session, source_url)
-        logging.info(f"Encontradas {len(all_sections)} secciones en {source_url}")
-        
-        # 2. Obtener URLs de sitemaps (MEJORA)
-        sitemap_urls = await get_sitemap_urls(session, source_url)
-        logging.info(f"Encontradas {len(sitemap_urls)} URLs en sitemap de {source_url}")
-        
-        all_links = set()
-        
-        # 3. Raspar cada sección (MANTIENE LÓGICA ORIGINAL PERO MEJORADA)
-        for section_url in all_sections:
-            html = await fetch_html(session, section_url, domain)
-            if not html:
-                continue
-
-            soup = BeautifulSoup(html, 'html.parser')
-            for a in soup.find_all('a', href=True):
-                link = a['href']
-                if not link.startswith('http'):
-                    link = urljoin(section_url, link)
-                if link.startswith('http') and is_article_url(link):
-                    all_links.add(link)
-
-            # Deep scraping opcional (MANTIENE COMPORTAMIENTO ORIGINAL)
-            if args.deep_scrape:
-                secondary_links = set()
-                for link in list(all_links)[:15]:
-                    html = await fetch_html(session, link, domain)
-                    if html:
-                        secondary_soup = BeautifulSoup(html, 'html.parser')
-                        for a in secondary_soup.find_all('a', href=True):
-                            sec_link = a['href']
-                            if not sec_link.startswith('http'):
-                                sec_link = urljoin(source_url, sec_link)
-                            if sec_link.startswith('http') and is_article_url(sec_link):
-                                secondary_links.add(sec_link)
-                all_links.update(secondary_links)
-
-        # 4. Agregar URLs de sitemaps
-        all_links.update(sitemap_urls)
-        
-        # Limitar enlaces como en original
-        links = list(all_links)[:args.max_links_per_site]
-        logging.info(f"Encontrados {len(links)} enlaces en {source_url}")
+        # Modo --feeds: un feed por fuente en lugar de portada + secciones.
+        # Si la fuente no anuncia feeds (o no responden) se recorre como siempre.
+        links = None
+        sections = None
+        if args.feeds:
+            feeds = cached_feeds(FEED_CACHE, source_url, FEED_CACHE_MAX_AGE)
+            if feeds is None:
+                sections = await discover_sections(session, source_url)
+                feeds = FEED_CACHE.get(source_url, {}).get('feeds', [])
+            if feeds:
+                links = await collect_feed_links(session, source_url, feeds)
+                if links is None:
+                    FEED_CACHE.pop(source_url, None)
+            if links is None:
+                logging.info("Sin feeds utilizables en %s, se recorren las secciones", source_url)
+        if links is None:
+            links = await collect_crawl_links(session, source_url, sections)
+        # Canonicalizar y deduplicar antes de limitar, como en original
+        links = await dedupe_links(links, args.max_links_per_site)
+        METRICS.count('links_scheduled', len(links))
+        logging.info("Encontrados %s enlaces en %s", len(links), source_url)
 
-        # Validación opcional (MISMO CÓDIGO ORIGINAL)
+        # Validación opcional en paralelo
         if args.validate_links:
-            valid_links = []
-            for link in links:
-                if await validate_link(session, link):
-                    valid_links.append(link)
-            logging.info(f"Enlaces válidos en {source_url}: {len(valid_links)}")
+            checks = await asyncio.gather(*(validate_link(session, url) for _, url in links))
+            valid_links = [link for link, ok in zip(links, checks) if ok]
+            logging.info("Enlaces válidos en %s: %s", source_url, len(valid_links))
         else:
             valid_links = links
 
-        # Procesar artículos (MISMO CÓDIGO ORIGINAL)
+        # Procesar artículos en paralelo; se cancela el resto al llegar a max_results.
+        # Cada resultado se agrupa con SimHash antes de escribirlo o emitirlo:
+        # las copias de una nota ya emitida y las republicaciones no salen.
         results = []
-        for link in valid_links:
-            result = await process_article(session, link, source_url)
-            if result:
-                logging.info(f"Noticia encontrada: {result['title']} (Fuente: {result['source']})")
+        tasks = [asyncio.create_task(process_article(session, url, source_url, key)) for key, url in valid_links]
+        try:
+            for future in asyncio.as_completed(tasks):
+                result = await future
+                if not result:
+                    continue
+                if args.max_results > 0 and RESULT_WRITER.count >= args.max_results:
+                    break
+                if CLUSTERS is not None:
+                    with METRICS.timer('dedup'):
+                        kind, representative = CLUSTERS.add(result)
+                    if kind == StreamingClusters.REPOST:
+                        logging.debug("Artículo descartado %s: ya visto en una corrida anterior", result['url'])
+                        METRICS.count('results_reposts')
+                        continue
+                    if kind == StreamingClusters.DUPLICATE:
+                        logging.debug("Artículo %s agrupado con %s", result['url'], representative['url'])
+                        METRICS.count('results_duplicates')
+                        continue
+                logging.info("Noticia encontrada: %s (Fuente: %s)", result['title'], result['source'])
+                with METRICS.timer('output'):
+                    RESULT_WRITER.add(result)
+                METRICS.count('results')
                 results.append(result)
-                if args.max_results > 0 and len(results) >= args.max_results:
+                if args.max_results > 0 and RESULT_WRITER.count >= args.max_results:
                     break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        limiter = get_host_limiter(domain)
+        logging.info(
+            "Estadísticas de %s: %s solicitudes, concurrencia máxima %s/%s, tasa %.2f req/s, %s respuestas 429/503, %s respuestas 500/502/504",
+            source_url, limiter.requests, limiter.peak, limiter.max_concurrency, limiter.rate, limiter.throttled, limiter.server_errors
+        )
         return results
         
     except Exception as e:
-        logging.error(f"Error accediendo a {source_url}: {e}")
+        logging.error("Error accediendo a %s: %s", source_url, e)
         return []
 
-# MAIN FUNCTION (EXACTAMENTE IGUAL AL ORIGINAL)
-async def main():
-    all_results = []
-    async with ClientSession(timeout=ClientTimeout(total=60)) as session:
-        logging.info("Iniciando radar de noticias optimizado v4 compatible...")
-        tasks = [scrape_site(session, url) for url in NEWS_SOURCES]
-        for future in asyncio.as_completed(tasks):
-            results = await future
-            all_results.extend(results)
-            if args.max_results > 0 and len(all_results) >= args.max_results:
-                all_results = all_results[:args.max_results]
-                break
+RESULT_WRITER = None
+CLUSTERS = None
 
-    # Ordenar por relevancia (MISMO ORIGINAL)
-    all_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+def configure(options):
+    """Prepara el estado global de una corrida a partir de sus argumentos.
+
+    Radar.run() la llama antes de cada corrida. Lo que vale la pena conservar
+    entre corridas (base de URLs vistas, estado AIMD por dominio, caché de
+    feeds; la sesión HTTP y los procesos de parseo viven en el Radar) se
+    reutiliza, y lo propio de cada corrida (palabras clave, fuentes, cachés
+    en memoria y contadores) se arma de nuevo.
+    """
+    global args, TODAY, YESTERDAY, OUTPUT_PATH, KEYWORDS, PROFILES, NEWS_SOURCES, TWITTER_USERS
+    global SEEN_URLS, HOST_SETTINGS, GLOBAL_SEMAPHORE, HOST_LIMITERS, KEYWORD_MATCHER
+    global URL_CLASSIFIERS, ARTICLE_URL_MEMO, HTML_CACHE, HTTP_CACHE
+    global SCHEDULED_KEYS, SECTION_KEYS, DEDUP_STATS, PREFILTER_STATS, HOST_STATE, FEED_CACHE, RECORDER, METRICS
+    args = options
+    TODAY = datetime.now().date()
+    YESTERDAY = TODAY - timedelta(days=1)
+    OUTPUT_PATH = options.output
+    KEYWORDS, profiles, sources, TWITTER_USERS = load_inputs(options)
+    NEWS_SOURCES, HOST_SETTINGS = split_sources(sources)
+
+    if SEEN_URLS is None or SEEN_URLS.path != options.seen_db:
+        if SEEN_URLS is not None:
+            SEEN_URLS.close()
+        SEEN_URLS = SeenUrlStore(options.seen_db, options.seen_ttl_days * 86400, options.retry_failed_after * 60)
+        SEEN_URLS.import_pickle(CACHE_FILE)
+    else:
+        SEEN_URLS.ttl_seconds = options.seen_ttl_days * 86400
+        SEEN_URLS.retry_after_seconds = options.retry_failed_after * 60
+
+    if HOST_STATE is None:
+        HOST_STATE = load_host_state(HOST_STATE_FILE)
+    if FEED_CACHE is None:
+        FEED_CACHE = load_feed_cache(FEED_CACHE_FILE)
+    GLOBAL_SEMAPHORE = asyncio.Semaphore(options.max_concurrency)
+    HOST_LIMITERS = {}
+    if profiles:
+        PROFILES = KeywordProfiles(profiles, options.accent_folding, options.word_boundary)
+        KEYWORD_MATCHER = PROFILES.matcher
+    else:
+        PROFILES = None
+        KEYWORD_MATCHER = KeywordMatcher(
+            KEYWORDS,
+            fold_accents=options.accent_folding,
+            word_boundary=options.word_boundary
+        )
+    URL_CLASSIFIERS = build_url_classifiers(HOST_SETTINGS)
+    ARTICLE_URL_MEMO = {}
+    HTML_CACHE = HtmlCache(options.html_cache_mb * 1024 * 1024)
+    # Al grabar se baja todo completo: un 304 del caché HTTP dejaría la URL sin grabar
+    http_cache_bytes = 0 if options.record else options.http_cache_mb * 1024 * 1024
+    HTTP_CACHE = HttpDiskCache(options.http_cache_dir, http_cache_bytes, options.http_cache_ttl * 3600)
+    RECORDER = WarcWriter(options.record) if options.record else None
+    SCHEDULED_KEYS = {}
+    SECTION_KEYS = set()
+    DEDUP_STATS = {"variants": 0, "aliases": 0, "canonical": 0, "canonical_ignored": 0}
+    PREFILTER_STATS = {"checked": 0, "rejected": 0, "cpu": 0.0, "parsed": 0, "parse_cpu": 0.0}
+    METRICS = RunMetrics()
+    for key in POOL_STATS:
+        POOL_STATS[key] = 0
+
+async def run_radar(session, on_result=None):
+    """Una corrida completa con la sesión y la etapa de parseo ya abiertas:
+    recorre las fuentes, escribe CSV/JSON y devuelve los resultados finales.
+    `on_result` recibe cada resultado apenas se encuentra."""
+    global RESULT_WRITER, CLUSTERS, HOST_STATE, RECORDER
 
-    # Crear carpeta de salida (MISMO ORIGINAL)
+    # Crear carpeta de salida; los resultados se escriben
+    # a medida que aparecen (NDJSON + CSV) y se ordenan al final.
     output_dir = os.path.dirname(OUTPUT_PATH)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
+    RESULT_WRITER = ResultWriter(OUTPUT_PATH, on_result)
 
-    # Guardar resultados en CSV (MISMO FORMATO ORIGINAL)
-    with open(OUTPUT_PATH, "w", newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["title", "date", "url", "description", "source", "relevance_score"],
-            lineterminator='\n',
-            quoting=csv.QUOTE_MINIMAL
+    # La misma nota publicada por varios medios se agrupa a medida que aparece:
+    # queda la primera encontrada con las demás URLs en "duplicates"; las ya
+    # vistas en corridas anteriores (huellas de los últimos --dedup-days días)
+    # se descartan.
+    fingerprint_entries = None
+    if args.no_dedup:
+        CLUSTERS = None
+    elif args.dedup_days > 0:
+        previous, fingerprint_entries = load_fingerprints(FINGERPRINTS_FILE, args.dedup_days * 86400)
+        CLUSTERS = StreamingClusters(previous)
+    else:
+        CLUSTERS = StreamingClusters()
+
+    logging.info("Iniciando radar de noticias optimizado v4 compatible...")
+    tasks = [asyncio.create_task(scrape_site(session, url)) for url in NEWS_SOURCES]
+    try:
+        for future in asyncio.as_completed(tasks):
+            await future
+            if args.max_results > 0 and RESULT_WRITER.count >= args.max_results:
+                break
+    finally:
+        # Al cortar por max_results no deben quedar sitios corriendo
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await cancel_pending_downloads()
+
+    # Los resultados finales son exactamente los emitidos (con los duplicates
+    # que se sumaron después), aunque un sitio se haya cortado a mitad de camino.
+    all_results = list(RESULT_WRITER.results)
+    if CLUSTERS is not None:
+        if fingerprint_entries is not None:
+            save_fingerprints(FINGERPRINTS_FILE, fingerprint_entries, all_results)
+        logging.info(
+            "Notas casi duplicadas: %s resultados agrupados en %s notas, %s republicaciones de corridas anteriores descartadas",
+            len(all_results) + CLUSTERS.duplicates, len(all_results), len(CLUSTERS.reposts)
+        )
+
+    # Ordenar por relevancia
+    all_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+
+    # CSV (columnas de siempre más duplicates) y JSON finales;
+    # con perfiles, además un CSV/JSON por perfil con su propio puntaje.
+    with METRICS.timer('output_final'):
+        RESULT_WRITER.close(all_results)
+        if PROFILES is not None:
+            for name in PROFILES.profiles:
+                path, count = RESULT_WRITER.write_profile(name, all_results)
+                logging.info("Perfil %s: %s noticias en %s", name, count, path)
+
+    # Mantenimiento de cachés y estado persistente
+    evicted = await asyncio.to_thread(SEEN_URLS.evict)
+    HOST_STATE = save_host_state(HOST_STATE_FILE, HOST_LIMITERS, HOST_STATE)
+    save_feed_cache(FEED_CACHE_FILE, FEED_CACHE)
+    pruned = await asyncio.to_thread(HTTP_CACHE.prune)
+    if RECORDER is not None:
+        await asyncio.to_thread(RECORDER.close)
+        logging.info("Grabadas %s respuestas (%s KB) en %s", RECORDER.count, RECORDER.bytes // 1024, RECORDER.path)
+        RECORDER = None
+
+    # Resumen de la corrida en el log
+    logging.info(
+        "Conexiones HTTP: %s abiertas, %s reutilizadas; caché DNS: %s aciertos, %s fallos",
+        POOL_STATS['opened'], POOL_STATS['reused'], POOL_STATS['dns_cache_hits'], POOL_STATS['dns_cache_misses']
+    )
+    logging.info(
+        "Caché de HTML: %s aciertos, %s fallos, %s desalojos",
+        HTML_CACHE.hits, HTML_CACHE.misses, HTML_CACHE.evictions
+    )
+    logging.info(
+        "Caché HTTP: %s respuestas 304 (%s KB no descargados), %s guardadas, %s eliminadas",
+        HTTP_CACHE.revalidated, HTTP_CACHE.bytes_saved // 1024, HTTP_CACHE.stored, pruned
+    )
+    logging.info("URLs vencidas eliminadas del registro: %s", evicted)
+    logging.info(
+        "Descargas duplicadas evitadas: %s variantes de URL (%s alias canónicos conocidos); %s notas repetidas detectadas por rel=canonical (%s canonical ignorados por apuntar a portada, sección u otro dominio)",
+        DEDUP_STATS['variants'], DEDUP_STATS['aliases'], DEDUP_STATS['canonical'], DEDUP_STATS['canonical_ignored']
+    )
+    if PREFILTER_STATS["checked"]:
+        # CPU evitada: páginas descartadas por el costo medio de parseo de las que pasaron
+        if PREFILTER_STATS["parsed"]:
+            average_parse = PREFILTER_STATS["parse_cpu"] / PREFILTER_STATS["parsed"]
+            saved = f"{PREFILTER_STATS['rejected'] * average_parse - PREFILTER_STATS['cpu']:.2f}s"
+        else:
+            saved = "no estimable (ninguna página parseada)"
+        logging.info(
+            "Prefiltro: %s/%s páginas descartadas (%.0f%%), costo %.2fs CPU, ahorro estimado de parseo %s",
+            PREFILTER_STATS['rejected'], PREFILTER_STATS['checked'],
+            100 * PREFILTER_STATS['rejected'] / PREFILTER_STATS['checked'], PREFILTER_STATS['cpu'], saved
         )
-        writer.writeheader()
-        writer.writerows(all_results)
-
-    # Guardar en JSON (MISMO FORMATO ORIGINAL)
-    json_output = OUTPUT_PATH.replace('.csv', '.json')
-    with open(json_output, 'w', encoding='utf-8') as f:
-        json.dump(
-            [{**result, "date": result["date"].isoformat()} for result in all_results],
-            f, ensure_ascii=False, indent=2
+    if RESULT_WRITER.first_result_after is not None:
+        logging.info(
+            "Primer resultado a los %.2fs; %s resultados emitidos durante la corrida",
+            RESULT_WRITER.first_result_after, RESULT_WRITER.count
         )
+    logging.info("Total de noticias encontradas: %s", len(all_results))
+    logging.info(
+        "Resultados guardados en: %s y %s (flujo en %s)",
+        OUTPUT_PATH, RESULT_WRITER.json_path, RESULT_WRITER.ndjson_path
+    )
+
+    # Métricas por etapa junto al CSV (y en formato Prometheus con --metrics-prom)
+    METRICS.write(metrics_path(OUTPUT_PATH), args.metrics_prom)
+    logging.info(
+        "Tiempo por etapa: %s (detalle en %s)",
+        ", ".join(f"{name} {histogram.total:.2f}s/{histogram.count}" for name, histogram in METRICS.slowest_stages()),
+        metrics_path(OUTPUT_PATH)
+    )
+    return all_results
+
+def report_profile(profiler):
+    """Guarda el perfil de la corrida (--profile) y resume lo más caro en el log."""
+    folded_path, blocking_path = profiler.write(os.path.splitext(OUTPUT_PATH)[0])
+    loop_samples = sum(profiler.samples.values())
+    worker_samples = sum(profiler.worker_samples.values())
+    logging.info(
+        "Perfil: %s muestras del event loop y %s de los procesos de parseo en %s",
+        loop_samples, worker_samples, folded_path
+    )
+    for frame, count in profiler.hottest_frames():
+        logging.info("Perfil: %.0f%% de las muestras del loop en %s", count / max(1, loop_samples) * 100, frame)
+    episodes = sorted(profiler.episodes, key=lambda e: e["seconds"], reverse=True)
+    if episodes:
+        blocked = sum(episode["seconds"] for episode in episodes)
+        logging.warning(
+            "Event loop bloqueado %s veces más de %.0f ms (%.2fs en total, detalle en %s)",
+            len(episodes), args.block_threshold_ms, blocked, blocking_path
+        )
+        for episode in episodes[:5]:
+            logging.warning(
+                "Bloqueo de %.0f ms a los %.1fs en %s: %s",
+                episode['seconds'] * 1000, episode['offset_seconds'], episode['task'] or 'un callback', episode['frame']
+            )
+
+class RadarConfig(argparse.Namespace):
+    """Configuración de una corrida: los mismos campos que los argumentos de
+    la CLI (con guiones bajos) y sus mismos valores por defecto.
+
+        RadarConfig(keywords=["Kicillof"], sources=["https://www.clarin.com"], today_only=True)
+
+    `keywords`, `sources` y `twitter_users` aceptan listas o texto JSON.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**vars(parser.parse_args([])))
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Opción desconocida: {name}")
+            setattr(self, name, value)
 
-    # Guardar caché (MISMO ORIGINAL)
-    with open(CACHE_FILE, 'wb') as f:
-        pickle.dump(PROCESSED_URLS, f)
+class Radar:
+    """Radar de noticias como biblioteca.
+
+        async with Radar(config) as radar:
+            results = await radar.run()
+            more = await radar.run(other_config)
+
+    Mientras está abierto conserva la sesión HTTP (pool de conexiones y caché
+    DNS) y los procesos de parseo, así las corridas siguientes salen en
+    caliente. El estado de la corrida vive en el módulo: un Radar por proceso.
+    """
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else RadarConfig()
+        self.session = None
+        self.parse_stage = None
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def open(self):
+        global PARSE_STAGE
+        if self.parse_stage is None:
+            self.parse_stage = PARSE_STAGE = ParseStage(self.config.parse_workers)
+            self.parse_stage.start()
+
+    async def close(self):
+        global SEEN_URLS
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.parse_stage is not None:
+            await self.parse_stage.close()
+            self.parse_stage = None
+        if SEEN_URLS is not None:
+            SEEN_URLS.close()
+            SEEN_URLS = None
+
+    async def run(self, config=None, on_result=None):
+        """Ejecuta una corrida (escribe CSV/JSON/NDJSON como la CLI) y devuelve
+        los resultados finales. `on_result` recibe cada resultado apenas se
+        encuentra. Fuera de `async with` abre y cierra todo alrededor de la corrida."""
+        if self.parse_stage is None:
+            async with self:
+                return await self.run(config, on_result)
+        configure(config if config is not None else self.config)
+        if self.session is None:
+            self.session = create_session()
+        if not args.profile:
+            return await run_radar(self.session, on_result)
+
+        global PROFILER
+        PROFILER = LoopProfiler(asyncio.get_running_loop(), args.profile_interval_ms / 1000, args.block_threshold_ms / 1000)
+        PROFILER.start()
+        try:
+            return await run_radar(self.session, on_result)
+        finally:
+            PROFILER.stop()
+            report_profile(PROFILER)
+            PROFILER = None
+
+# Punto de entrada de la CLI: una corrida con un Radar
+async def main(options):
+    await Radar(options).run(on_result=print_result if options.stream_results else None)
+
+# Modo --daemon: un proceso de larga vida que recibe trabajos por stdin, uno
+# por línea ({"id": "1", "keywords": [...], "sources": [...], "today_only": true})
+# y responde eventos JSON por stdout (ready, started, result, done, error).
+# Los trabajos corren de a uno; los argumentos de arranque del daemon valen
+# como valores por defecto de cada trabajo.
+def emit(event):
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+
+def job_argv(job):
+    """Convierte un trabajo JSON en argumentos de línea de comandos (los
+    `false` los aplica job_options)."""
+    argv = []
+    for key, value in job.items():
+        if key == 'id' or value is None or value is False:
+            continue
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif isinstance(value, (list, dict)):
+            argv.extend([flag, json.dumps(value, ensure_ascii=False)])
+        else:
+            argv.extend([flag, str(value)])
+    return argv
+
+# Opciones que fija el arranque del daemon (los procesos de parseo se crean
+# una vez para todos los trabajos)
+DAEMON_ONLY_OPTIONS = ('parse_workers', 'daemon')
+# Formas de dar las palabras clave: la que trae un trabajo reemplaza a todas
+# las del daemon (si no, unas palabras del daemon chocarían con los perfiles
+# del trabajo)
+KEYWORD_OPTIONS = ('keywords', 'keywords_file', 'profiles', 'profiles_file')
+
+def job_options(job, daemon_args):
+    """Argumentos de un trabajo sobre los del daemon.
+
+    Un `false` apaga una opción booleana aunque el daemon la tenga activada
+    (p. ej. `"feeds": false` con un daemon lanzado con --feeds); en una opción
+    que no es booleana es un error, igual que pedir una de DAEMON_ONLY_OPTIONS.
+    """
+    defaults = vars(daemon_args).copy()
+    for key, value in job.items():
+        dest = key.replace('-', '_')
+        if dest in DAEMON_ONLY_OPTIONS:
+            raise ValueError(f"{key}: en modo daemon vale solo el valor de arranque del daemon")
+        if dest in KEYWORD_OPTIONS and value is not None:
+            defaults.update(dict.fromkeys(KEYWORD_OPTIONS))
+    try:
+        options = parser.parse_args(job_argv(job), namespace=argparse.Namespace(**defaults))
+    except SystemExit:
+        raise ValueError("Argumentos inválidos en el trabajo")
+    for key, value in job.items():
+        if value is False:
+            dest = key.replace('-', '_')
+            if not isinstance(getattr(options, dest, None), bool):
+                raise ValueError(f"{key}: false solo vale para opciones booleanas")
+            setattr(options, dest, False)
+    return options
+
+async def run_job(radar, daemon_args, job):
+    job_id = job.get('id')
+    started = time.monotonic()
+    try:
+        options = job_options(job, daemon_args)
+        emit({"event": "started", "id": job_id})
+        results = await radar.run(options, lambda record: emit({"event": "result", "id": job_id, "result": record}))
+        emit({
+            "event": "done", "id": job_id, "total": len(results),
+            "output": RESULT_WRITER.csv_path, "json": RESULT_WRITER.json_path,
+            "metrics": metrics_path(RESULT_WRITER.csv_path),
+            "elapsed": round(time.monotonic() - started, 3)
+        })
+    except Exception as e:
+        logging.error("Error en el trabajo %s: %s", job_id, e)
+        emit({"event": "error", "id": job_id, "error": str(e)})
+
+async def serve(daemon_args):
+    """Atiende trabajos por stdin hasta EOF con un mismo Radar abierto."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    async with Radar(daemon_args) as radar:
+        emit({"event": "ready", "pid": os.getpid()})
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                emit({"event": "error", "id": None, "error": f"JSON inválido: {e}"})
+                continue
+            await run_job(radar, daemon_args, job)
 
-    # Resumen (MISMO ORIGINAL)
-    logging.info(f"Total de noticias encontradas: {len(all_results)}")
-    logging.info(f"Resultados guardados en: {OUTPUT_PATH} y {json_output}")
+def cli(argv=None):
+    """Punto de entrada de línea de comandos."""
+    options = parser.parse_args(argv)
+    setup_logging(options)
+    asyncio.run(serve(options) if options.daemon else main(options))
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    cli()
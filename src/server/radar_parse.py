@@ -0,0 +1,70 @@
+"""Etapa de parseo de artículos para radar_optimo.py.
+
+Estas funciones se ejecutan dentro de los procesos del ProcessPoolExecutor,
+por eso viven en un módulo sin efectos secundarios al importarse (sin
+argparse ni carga de archivos). newspaper se importa recién en
+parse_article_html: el prefiltro del proceso principal no lo necesita.
+"""
+import html as html_lib
+import re
+import time
+from radar_dates import extract_publish_date
+from radar_simhash import simhash
+
+# Prefiltro barato sobre el HTML crudo: se descartan scripts, estilos y
+# etiquetas con expresiones compiladas, sin construir ningún DOM. Se conservan
+# los atributos content de <meta> (og:title, description, ...) porque
+# newspaper puede tomar el título de ahí.
+_NON_TEXT_BLOCKS = re.compile(r'<(script|style|noscript|svg)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_META_CONTENT = re.compile(r'<meta\b[^>]*?\bcontent\s*=\s*["\']([^"\']*)', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'\s+')
+
+def html_to_search_text(html):
+    """Texto aproximado de una página para el prefiltro de palabras clave.
+
+    Los espacios se colapsan como en el texto extraído: una palabra clave de
+    varias palabras tiene que coincidir aunque el HTML las separe con un salto
+    de línea, sangría o una etiqueta en línea.
+
+    >>> html_to_search_text('<p>Axel\\n   Kicillof</p>')
+    ' Axel Kicillof '
+    >>> html_to_search_text('<p>Axel <b>Kicillof</b></p>')
+    ' Axel Kicillof '
+    >>> html_to_search_text('<p><a href="/x">Axel</a> Kicillof</p>')
+    ' Axel Kicillof '
+    """
+    meta = ' '.join(_META_CONTENT.findall(html))
+    text = _TAGS.sub(' ', _NON_TEXT_BLOCKS.sub(' ', html))
+    return _SPACES.sub(' ', html_lib.unescape(meta + ' ' + text))
+
+def parse_article_html(url, html):
+    """Parsea el HTML de un artículo y devuelve solo los campos necesarios.
+
+    Se devuelve un dict chico (título, texto, fecha, URL canónica y huella
+    SimHash del texto) en lugar del Article o del soup para que el paso
+    entre procesos sea barato.
+    """
+    from newspaper import Article
+
+    started = time.process_time()
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+
+    date_started = time.process_time()
+    if article.publish_date:
+        publish_date = article.publish_date.date()
+    else:
+        publish_date = extract_publish_date(article.html, url)
+    date_cpu = time.process_time() - date_started
+
+    return {
+        "title": article.title,
+        "text": article.text,
+        "publish_date": publish_date,
+        "canonical_url": article.canonical_link or None,
+        "fingerprint": simhash(article.text),
+        "parse_cpu": time.process_time() - started,
+        "date_cpu": date_cpu,
+    }
@@ -0,0 +1,202 @@
+"""Perfilado por muestreo de una corrida de radar_optimo.py (--profile).
+
+Un hilo toma cada --profile-interval-ms la pila del hilo del event loop con
+sys._current_frames() y cuenta las pilas iguales, sin instrumentar ninguna
+función. Cada muestra es solo la tupla de objetos de código de la pila; los
+nombres de los marcos se arman una vez por pila distinta al escribir el
+perfil, no en cada muestra. En los
+procesos de parseo cada llamada se envuelve en profile_call, que muestrea
+solo mientras dura la llamada y devuelve las pilas junto con el resultado.
+
+El mismo hilo vigila el loop: una tarea actualiza un latido cada intervalo y,
+si el latido se atrasa más de --block-threshold-ms, el loop está bloqueado
+por código sincrónico; se registra el episodio con la tarea que estaba
+corriendo y las pilas muestreadas durante el bloqueo.
+
+Se escriben dos archivos junto al CSV:
+- `noticias.profile.folded`: pilas en formato "collapsed" (una línea
+  `marco;marco;marco cantidad`), listo para flamegraph.pl o speedscope.
+  Las pilas de los procesos de parseo llevan el prefijo `parse-worker`.
+- `noticias.profile.blocking.json`: episodios de bloqueo del loop.
+"""
+import asyncio
+from collections import Counter
+import json
+import os
+import sys
+import threading
+import time
+
+WORKER_ROOT = 'parse-worker'
+
+def _frame_name(code):
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def stack_codes(frame):
+    """Objetos de código de la pila de un frame, del frame actual a la raíz."""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(codes)
+
+def format_stacks(samples):
+    """Pasa {tupla de códigos: cantidad} a {pila collapsed: cantidad}."""
+    names = {}
+    folded = Counter()
+    for codes, count in samples.items():
+        for code in codes:
+            if code not in names:
+                names[code] = _frame_name(code)
+        folded[';'.join(names[code] for code in reversed(codes))] += count
+    return folded
+
+def collapse_codes(codes):
+    """Una tupla de stack_codes en formato collapsed (de la raíz al frame actual)."""
+    return ';'.join(_frame_name(code) for code in reversed(codes))
+
+class StackSampler:
+    """Muestrea la pila de un hilo mientras `enabled` está activo.
+
+    `samples` cuenta tuplas de objetos de código (ver stack_codes).
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.enabled = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name='radar-profiler', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped:
+            self.enabled.wait()
+            time.sleep(self.interval)
+            if self.enabled.is_set() and not self.stopped:
+                self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            stack = stack_codes(frame)
+            self.samples[stack] += 1
+            return stack
+        return None
+
+    def take(self):
+        """Devuelve las pilas muestreadas ya formateadas y empieza de cero."""
+        samples, self.samples = self.samples, Counter()
+        return format_stacks(samples)
+
+    def stop(self):
+        self.stopped = True
+        self.enabled.set()
+        self.thread.join()
+
+_WORKER_SAMPLER = None
+
+def profile_call(interval, function, *args):
+    """Ejecuta `function(*args)` muestreando su pila (dentro de un proceso de
+    parseo). Devuelve (resultado, pilas muestreadas); las pilas se formatean
+    acá porque los objetos de código no se pueden enviar entre procesos."""
+    global _WORKER_SAMPLER
+    if _WORKER_SAMPLER is None or _WORKER_SAMPLER.interval != interval:
+        _WORKER_SAMPLER = StackSampler(threading.get_ident(), interval)
+    _WORKER_SAMPLER.enabled.set()
+    try:
+        result = function(*args)
+    finally:
+        _WORKER_SAMPLER.enabled.clear()
+    return result, _WORKER_SAMPLER.take()
+
+class LoopProfiler(StackSampler):
+    """Muestreo del hilo del event loop más detección de bloqueos."""
+
+    def __init__(self, loop, interval, block_threshold):
+        self.loop = loop
+        self.block_threshold = block_threshold
+        self.tick = time.monotonic()
+        self.heartbeat = None
+        self.episode = None
+        self.episodes = []
+        self.worker_samples = Counter()
+        self.started = None
+        super().__init__(threading.get_ident(), interval)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.tick = self.started
+        self.heartbeat = self.loop.create_task(self._beat())
+        self.enabled.set()
+
+    async def _beat(self):
+        while True:
+            self.tick = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def sample(self):
+        stack = super().sample()
+        late = time.monotonic() - self.tick - self.interval
+        if late > self.block_threshold:
+            if self.episode is None:
+                self.episode = {"started": self.tick, "task": self._current_task(), "stacks": Counter()}
+            if stack:
+                self.episode["stacks"][stack] += 1
+        elif self.episode is not None:
+            self._close_episode(self.tick)
+        return stack
+
+    def _current_task(self):
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        coro = task.get_coro()
+        return f"{task.get_name()} {getattr(coro, '__qualname__', coro)}"
+
+    def _close_episode(self, resumed):
+        episode, self.episode = self.episode, None
+        stacks = episode["stacks"]
+        stack = collapse_codes(stacks.most_common(1)[0][0]) if stacks else ''
+        self.episodes.append({
+            "seconds": round(resumed - episode["started"] - self.interval, 4),
+            "offset_seconds": round(episode["started"] - self.started, 3),
+            "task": episode["task"],
+            "frame": stack.rsplit(';', 1)[-1],
+            "stack": stack,
+        })
+
+    def add_worker_samples(self, samples):
+        self.worker_samples.update(samples)
+
+    def stop(self):
+        self.enabled.clear()
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+        super().stop()
+        if self.episode is not None:
+            self._close_episode(time.monotonic())
+
+    def write(self, base_path):
+        """Escribe las pilas y los bloqueos; devuelve (ruta de pilas, ruta de bloqueos)."""
+        folded_path = base_path + '.profile.folded'
+        blocking_path = base_path + '.profile.blocking.json'
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, count in format_stacks(self.samples).most_common():
+                f.write(f"{stack} {count}\n")
+            for stack, count in self.worker_samples.most_common():
+                f.write(f"{WORKER_ROOT};{stack} {count}\n")
+        with open(blocking_path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self.episodes, key=lambda e: e["seconds"], reverse=True), f, ensure_ascii=False, indent=2)
+        return folded_path, blocking_path
+
+    def hottest_frames(self, limit=5):
+        """Marcos con más muestras propias (el último de cada pila) en el loop."""
+        frames = Counter()
+        for codes, count in self.samples.items():
+            frames[codes[0]] += count
+        return [(_frame_name(code), count) for code, count in frames.most_common(limit)]
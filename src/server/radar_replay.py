@@ -0,0 +1,345 @@
+"""Grabación y reproducción de corridas para medir los radares sin salir a internet.
+
+`radar_optimo.py --record crawl.warc.gz` guarda cada respuesta 200 que baja
+(portadas, secciones, sitemaps, feeds y artículos) en un archivo con formato
+WARC 1.0: un registro `response` por URL, cada uno como un miembro gzip
+independiente, con el bloque HTTP completo (línea de estado, encabezados y
+cuerpo) tal como lo entregó el servidor.
+
+ReplayServer vuelve a servir ese archivo desde 127.0.0.1: cada dominio
+grabado recibe su propio puerto y las URLs absolutas a dominios grabados se
+reescriben en los cuerpos de texto para que los enlaces apunten al puerto
+local. Se puede agregar latencia con variación, 429 al azar y un límite de
+ancho de banda por dominio, y el servidor lleva la cuenta de cada pedido
+para bench_radar.py.
+
+Uso:
+    python3 radar_replay.py crawl.warc.gz --latency-ms 80 --jitter-ms 40 --rate-429 0.02 --bandwidth-kbps 512
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import gzip
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+from radar_urls import UrlClassifier
+
+WARC_VERSION = b'WARC/1.0'
+# Encabezados de la respuesta original que se conservan. Content-Length y
+# Content-Encoding no: el cuerpo se guarda ya descomprimido.
+KEPT_HEADERS = ('Content-Type', 'Last-Modified')
+TEXT_TYPES = ('text/', 'xml', 'json', 'javascript', 'rss', 'atom')
+GZIP_MAGIC = b'\x1f\x8b'
+BANDWIDTH_TICK = 0.05  # segundos entre bloques al limitar el ancho de banda
+
+class WarcWriter:
+    """Agrega registros `response` a un archivo WARC comprimido por registro.
+
+    record() se llama desde el event loop y solo encola la respuesta; la
+    compresión y la escritura las hace un hilo aparte, para no alterar los
+    tiempos de la corrida que se está grabando. close() espera a que se
+    escriba todo lo encolado.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.bytes = 0
+        self.urls = set()
+        self.file = open(path, 'wb')
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name='warc-writer', daemon=True)
+        self.thread.start()
+
+    def record(self, url, status, reason, headers, body):
+        if url in self.urls:
+            return
+        self.urls.add(url)
+        kept = [(name, headers[name]) for name in KEPT_HEADERS if name in headers]
+        self.queue.put((url, status, reason, kept, body, datetime.now(timezone.utc)))
+        self.count += 1
+        self.bytes += len(body)
+
+    def _run(self):
+        while (item := self.queue.get()) is not None:
+            try:
+                self.file.write(self._encode(*item))
+            except Exception as e:
+                logging.error("No se pudo grabar %s en %s: %s", item[0], self.path, e)
+
+    @staticmethod
+    def _encode(url, status, reason, headers, body, when):
+        head = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+        head += [f"{name}: {value}" for name, value in headers]
+        block = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1', 'replace') + body
+        warc_headers = (
+            f"WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {when.strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"Content-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(block)}\r\n"
+        ).encode('utf-8')
+        return gzip.compress(WARC_VERSION + b'\r\n' + warc_headers + b'\r\n' + block + b'\r\n\r\n')
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+class ArchivedResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return headers
+
+def read_warc(path):
+    """Recorre los registros `response` de un archivo WARC (.warc o .warc.gz)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"Registro WARC inválido en {path}: {line[:40]!r}")
+            header_lines = []
+            while True:
+                line = f.readline().rstrip(b'\r\n')
+                if not line:
+                    break
+                header_lines.append(line.decode('utf-8'))
+            warc_headers = _parse_headers(header_lines)
+            block = f.read(int(warc_headers['Content-Length']))
+            if warc_headers.get('WARC-Type') != 'response':
+                continue
+            head, _, body = block.partition(b'\r\n\r\n')
+            status_line, *http_lines = head.decode('latin-1').split('\r\n')
+            status = int(status_line.split()[1])
+            yield ArchivedResponse(warc_headers['WARC-Target-URI'], status, _parse_headers(http_lines), body)
+
+def origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class ReplayStats:
+    """Pedidos atendidos: latencia vista por el servidor (llegada del pedido
+    hasta el último byte), artículos servidos y errores inyectados."""
+
+    def __init__(self):
+        self.latencies = []
+        self.requests = 0
+        self.articles = 0
+        self.throttled = 0
+        self.missing = 0
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "requests": self.requests,
+            "articles": self.articles,
+            "throttled": self.throttled,
+            "missing": self.missing,
+            "p50_ms": percentile(0.5) * 1000,
+            "p95_ms": percentile(0.95) * 1000,
+        }
+
+class HostBandwidth:
+    """Ancho de banda compartido por las respuestas de un dominio (token bucket en bytes)."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.tokens = bytes_per_second * BANDWIDTH_TICK
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def take(self, size):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate * BANDWIDTH_TICK, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= size:
+                    self.tokens -= size
+                    return
+                await asyncio.sleep((size - self.tokens) / self.rate)
+
+class ReplayServer:
+    """Sirve un archivo WARC grabado, un puerto local por dominio.
+
+    `latency_ms` ± `jitter_ms` se espera antes de responder; `rate_429` es la
+    probabilidad de contestar 429 con Retry-After; `bandwidth_kbps` limita lo
+    que entrega cada dominio (0 sin límite). Lo que no está grabado es 404.
+    """
+
+    def __init__(self, archive_path, latency_ms=0, jitter_ms=0, rate_429=0.0, bandwidth_kbps=0, seed=None):
+        self.archive_path = archive_path
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_429 = rate_429
+        self.bandwidth = bandwidth_kbps * 1024
+        self.random = random.Random(seed)
+        self.classifier = UrlClassifier()
+        self.responses = {}   # origen grabado -> {ruta: ArchivedResponse}
+        self.ports = {}       # origen grabado -> puerto local
+        self.runners = []
+        self.stats = ReplayStats()
+        self.load()
+
+    def load(self):
+        for response in read_warc(self.archive_path):
+            parts = urlsplit(response.url)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            response.is_article = self.classifier.is_article(parts, response.url)
+            self.responses.setdefault(origin(response.url), {})[path] = response
+
+    def local_url(self, url):
+        """URL grabada -> URL del servidor local (None si el dominio no está grabado)."""
+        port = self.ports.get(origin(url))
+        if port is None:
+            return None
+        parts = urlsplit(url)
+        return f"http://127.0.0.1:{port}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+
+    def homepages(self):
+        return [f"http://127.0.0.1:{self.ports[host]}" for host, paths in self.responses.items() if '/' in paths]
+
+    def _rewrite_bodies(self):
+        # Una sola pasada por cuerpo: http://, https:// o // seguidos de un
+        # dominio grabado (y no de un dominio más largo u otro puerto)
+        netlocs = {urlsplit(host).netloc: f"http://127.0.0.1:{port}" for host, port in self.ports.items()}
+        pattern = re.compile(
+            rb'(?:https?:)?//(' + b'|'.join(re.escape(n.encode()) for n in sorted(netlocs, key=len, reverse=True)) + rb')(?![\w.-]|:\d)'
+        )
+        targets = {netloc.encode(): local.encode() for netloc, local in netlocs.items()}
+        def rewrite(body):
+            return pattern.sub(lambda m: targets[m.group(1)], body)
+
+        for paths in self.responses.values():
+            for response in paths.values():
+                content_type = response.headers.get('Content-Type', '')
+                if response.body.startswith(GZIP_MAGIC):
+                    # Sitemaps .xml.gz: las URLs están dentro del gzip
+                    try:
+                        response.body = gzip.compress(rewrite(gzip.decompress(response.body)))
+                    except (OSError, EOFError):
+                        pass
+                elif any(kind in content_type for kind in TEXT_TYPES):
+                    response.body = rewrite(response.body)
+
+    async def start(self):
+        from aiohttp import web
+
+        for host in self.responses:
+            app = web.Application()
+            app.router.add_route('*', '/{tail:.*}', self._handler(host))
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            self.runners.append(runner)
+            self.ports[host] = site._server.sockets[0].getsockname()[1]
+        self._rewrite_bodies()
+        self.bandwidths = {host: HostBandwidth(self.bandwidth) for host in self.responses} if self.bandwidth else {}
+
+    def _handler(self, host):
+        from aiohttp import web
+
+        paths = self.responses[host]
+
+        async def handle(request):
+            started = time.monotonic()
+            self.stats.requests += 1
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            response = paths.get(request.raw_path)
+            if response is None:
+                self.stats.missing += 1
+                return web.Response(status=404)
+            if self.rate_429 and self.random.random() < self.rate_429:
+                self.stats.throttled += 1
+                return web.Response(status=429, headers={'Retry-After': '1'})
+
+            headers = {name: value for name, value in response.headers.items() if name in KEPT_HEADERS}
+            reply = web.StreamResponse(status=response.status, headers=headers)
+            reply.content_length = len(response.body)
+            await reply.prepare(request)
+            if request.method != 'HEAD':
+                bandwidth = self.bandwidths.get(host)
+                chunk = max(1, int(self.bandwidth * BANDWIDTH_TICK)) if bandwidth else len(response.body) or 1
+                for start in range(0, len(response.body), chunk):
+                    piece = response.body[start:start + chunk]
+                    if bandwidth:
+                        await bandwidth.take(len(piece))
+                    await reply.write(piece)
+            await reply.write_eof()
+            self.stats.latencies.append(time.monotonic() - started)
+            if response.is_article and request.method != 'HEAD':
+                self.stats.articles += 1
+            return reply
+
+        return handle
+
+    def reset_stats(self):
+        self.stats = ReplayStats()
+
+    async def stop(self):
+        for runner in self.runners:
+            await runner.cleanup()
+        self.runners = []
+
+def add_replay_arguments(parser):
+    parser.add_argument('archive', type=str, help='Archivo WARC grabado con radar_optimo.py --record')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latencia agregada a cada respuesta (ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Variación aleatoria de la latencia (± ms)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Probabilidad de responder 429 a un pedido')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help='Ancho de banda por dominio en KB/s (0 sin límite)')
+    parser.add_argument('--seed', type=int, default=None, help='Semilla para latencia y 429 reproducibles')
+
+def replay_server_from_args(args):
+    return ReplayServer(args.archive, args.latency_ms, args.jitter_ms, args.rate_429, args.bandwidth_kbps, args.seed)
+
+async def serve_forever(args):
+    server = replay_server_from_args(args)
+    await server.start()
+    for host, port in server.ports.items():
+        print(f"{host} -> http://127.0.0.1:{port} ({len(server.responses[host])} respuestas)")
+    print(f"Fuentes: {json.dumps(server.homepages())}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor local que reproduce una corrida grabada')
+    add_replay_arguments(parser)
+    try:
+        asyncio.run(serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,126 @@
+"""Escritura de resultados de radar_optimo.py a medida que se encuentran.
+
+Cada resultado se agrega enseguida a `<salida>.ndjson` y al CSV (sin
+ordenar), así un corte o un timeout no pierde lo ya encontrado. Con
+`on_result` (print_result para --stream-results, o el emisor de eventos del
+modo --daemon) cada resultado también se entrega en vivo. radar_optimo.py
+agrupa los casi duplicados antes de llamar a `add`, así que las filas
+emitidas son las mismas que las finales. Al cerrar, el CSV y el JSON se
+reescriben ordenados y con la lista `duplicates` completa (mismo formato de
+siempre) a través de un archivo temporal.
+"""
+import csv
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+CSV_FIELDS = ["title", "date", "url", "description", "source", "relevance_score", "duplicates"]
+STREAM_PREFIX = 'RESULT '
+
+def result_record(result):
+    """Resultado serializable: fecha ISO, lista de duplicados y sin la huella interna."""
+    record = {key: value for key, value in result.items() if key != 'fingerprint'}
+    record['date'] = result['date'].isoformat()
+    record['duplicates'] = result.get('duplicates', [])
+    return record
+
+def print_result(record):
+    """Emite un resultado por stdout como `RESULT {json}` (python-executor.js los reenvía)."""
+    sys.stdout.write(STREAM_PREFIX + json.dumps(record, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+
+def csv_row(record):
+    return {**record, 'duplicates': ' '.join(record['duplicates'])}
+
+def profile_slug(name):
+    """Nombre de un perfil apto para archivos: sin tildes, en minúsculas y con
+    `_` en lugar de lo que no sea letra, número o guion ("Gobernación" ->
+    "gobernacion"). Dos perfiles no pueden compartir slug."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9-]+', '_', ascii_name.lower()).strip('_') or 'perfil'
+
+def profile_path(output_path, name):
+    """Ruta del CSV de un perfil: `noticias.csv` -> `noticias_<slug>.csv`."""
+    base, extension = os.path.splitext(output_path)
+    return f"{base}_{profile_slug(name)}{extension or '.csv'}"
+
+def write_final(csv_path, json_path, records):
+    """Escribe CSV y JSON finales a través de archivos temporales."""
+    tmp_path = csv_path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = _csv_writer(f)
+        writer.writeheader()
+        writer.writerows(csv_row(record) for record in records)
+    os.replace(tmp_path, csv_path)
+
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, json_path)
+
+def _csv_writer(f):
+    return csv.DictWriter(
+        f,
+        fieldnames=CSV_FIELDS,
+        extrasaction='ignore',
+        lineterminator='\n',
+        quoting=csv.QUOTE_MINIMAL
+    )
+
+class ResultWriter:
+    """Agrega resultados al NDJSON y al CSV parcial, y arma los archivos finales al cerrar."""
+
+    def __init__(self, output_path, on_result=None):
+        base = os.path.splitext(output_path)[0]
+        self.csv_path = output_path
+        self.json_path = base + '.json'
+        self.ndjson_path = base + '.ndjson'
+        self.on_result = on_result
+        self.count = 0
+        self.results = []
+        self.started = time.monotonic()
+        self.first_result_after = None
+        self.ndjson_file = open(self.ndjson_path, 'w', encoding='utf-8')
+        self.csv_file = open(self.csv_path, 'w', newline='', encoding='utf-8')
+        self.csv_writer = _csv_writer(self.csv_file)
+        self.csv_writer.writeheader()
+        self.csv_file.flush()
+
+    def add(self, result):
+        record = result_record(result)
+        self.ndjson_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.ndjson_file.flush()
+        self.csv_writer.writerow(csv_row(record))
+        self.csv_file.flush()
+        if self.on_result is not None:
+            self.on_result(record)
+        if self.first_result_after is None:
+            self.first_result_after = time.monotonic() - self.started
+        self.results.append(result)
+        self.count += 1
+
+    def close(self, results):
+        """Reescribe CSV y JSON con los resultados finales (ya ordenados)."""
+        self.ndjson_file.close()
+        self.csv_file.close()
+        write_final(self.csv_path, self.json_path, [result_record(result) for result in results])
+
+    def write_profile(self, name, results):
+        """CSV y JSON de un perfil: sus resultados con su puntaje, en el formato
+        de siempre (sin la columna de perfiles). Devuelve (ruta, cantidad)."""
+        records = []
+        for result in results:
+            score = result.get('profiles', {}).get(name)
+            if score is None:
+                continue
+            record = result_record(result)
+            del record['profiles']
+            record['relevance_score'] = score
+            records.append(record)
+        records.sort(key=lambda record: record['relevance_score'], reverse=True)
+        csv_path = profile_path(self.csv_path, name)
+        write_final(csv_path, os.path.splitext(csv_path)[0] + '.json', records)
+        return csv_path, len(records)
@@ -0,0 +1,171 @@
+"""Registro persistente de URLs ya procesadas (SQLite).
+
+Reemplaza al pickle `radar_cache.pkl`: cada URL tiene estado y marcas de
+tiempo, las entradas vencen por TTL y los fallos se reintentan. Las
+consultas van por la clave primaria, sin cargar todo en memoria, y el modo
+WAL permite que dos procesos del radar usen la misma base a la vez.
+
+También guarda alias: URLs cuyo `<link rel="canonical">` apunta a otra, para
+que las corridas siguientes no descarguen de nuevo la misma nota.
+
+Las consultas son bloqueantes (con `timeout=30` pueden esperar el lock de
+otro proceso): desde el event loop se llaman con `asyncio.to_thread`. La
+conexión se comparte entre hilos y un lock serializa su uso.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from radar_urls import canonicalize_url, url_key
+
+STATUS_IN_PROGRESS = 'in_progress'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+# Parámetros por consulta en resolve_aliases (SQLite admite al menos 999)
+ALIAS_BATCH = 500
+
+class SeenUrlStore:
+    """URLs vistas con estado (en curso, hecha, fallida) y vencimiento."""
+
+    def __init__(self, path, ttl_seconds, retry_after_seconds, max_attempts=3, lease_seconds=1800):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen_urls ('
+            ' url TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' first_seen REAL NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS seen_urls_updated_at ON seen_urls (updated_at)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS url_aliases ('
+            ' alias TEXT PRIMARY KEY,'
+            ' canonical TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+
+    def claim(self, url):
+        """Reserva la URL para procesarla. Devuelve False si no corresponde.
+
+        Es atómico: se puede reservar si la URL es nueva, si falló hace más de
+        `retry_after_seconds` (y no agotó los intentos), si venció, o si otro
+        proceso la dejó "en curso" más tiempo que `lease_seconds`.
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT INTO seen_urls (url, status, attempts, first_seen, updated_at) VALUES (?, ?, 1, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET status = excluded.status, attempts = attempts + 1, updated_at = excluded.updated_at '
+                'WHERE updated_at < ? '
+                'OR (status = ? AND updated_at < ? AND attempts < ?) '
+                'OR (status = ? AND updated_at < ?)',
+                (url, STATUS_IN_PROGRESS, now, now,
+                 now - self.ttl_seconds,
+                 STATUS_FAILED, now - self.retry_after_seconds, self.max_attempts,
+                 STATUS_IN_PROGRESS, now - self.lease_seconds)
+            )
+        return cursor.rowcount > 0
+
+    def _set_status(self, url, status):
+        with self.lock:
+            self.conn.execute(
+                'UPDATE seen_urls SET status = ?, updated_at = ? WHERE url = ?',
+                (status, time.time(), url)
+            )
+
+    def mark_done(self, url):
+        self._set_status(url, STATUS_DONE)
+
+    def mark_failed(self, url):
+        self._set_status(url, STATUS_FAILED)
+
+    def release(self, url):
+        """Libera una reserva que no llegó a procesarse (p. ej. tarea cancelada)."""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE seen_urls SET status = ?, attempts = attempts - 1, updated_at = 0 WHERE url = ? AND status = ?',
+                (STATUS_FAILED, url, STATUS_IN_PROGRESS)
+            )
+
+    def add_alias(self, alias, canonical):
+        """Registra que `alias` es otra URL de la nota `canonical`."""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO url_aliases (alias, canonical, updated_at) VALUES (?, ?, ?)',
+                (alias, canonical, time.time())
+            )
+
+    def resolve_alias(self, url):
+        """Devuelve la URL canónica registrada para `url` (o la misma URL)."""
+        return self.resolve_aliases([url]).get(url, url)
+
+    def resolve_aliases(self, urls):
+        """Devuelve {alias: canónica} de las `urls` que tienen alias registrado.
+
+        Resuelve todos los enlaces de un sitio con una consulta por cada
+        ALIAS_BATCH URLs en lugar de una por enlace.
+        """
+        urls = list(urls)
+        aliases = {}
+        with self.lock:
+            for start in range(0, len(urls), ALIAS_BATCH):
+                batch = urls[start:start + ALIAS_BATCH]
+                aliases.update(self.conn.execute(
+                    'SELECT alias, canonical FROM url_aliases WHERE alias IN (%s)' % ','.join('?' * len(batch)),
+                    batch
+                ))
+        return aliases
+
+    def evict(self):
+        """Elimina entradas vencidas por TTL y devuelve cuántas se borraron."""
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM seen_urls WHERE updated_at < ? AND status != ?',
+                (cutoff, STATUS_IN_PROGRESS)
+            )
+            self.conn.execute('DELETE FROM url_aliases WHERE updated_at < ?', (cutoff,))
+        return cursor.rowcount
+
+    def import_pickle(self, path):
+        """Migra una sola vez el antiguo `radar_cache.pkl` si la base está vacía.
+
+        El pickle guardaba las URLs tal como aparecían en la página; se
+        registran con la misma clave que usa el radar (url_key de la URL
+        canonicalizada) para que sigan contando como vistas.
+        """
+        if not os.path.exists(path):
+            return 0
+        if self.conn.execute('SELECT 1 FROM seen_urls LIMIT 1').fetchone():
+            return 0
+        try:
+            with open(path, 'rb') as f:
+                urls = pickle.load(f)
+        except Exception as e:
+            logging.warning("No se pudo migrar %s: %s", path, e)
+            return 0
+        keys = {url_key(canonicalize_url(url)) for url in urls if isinstance(url, str)}
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen_urls (url, status, attempts, first_seen, updated_at) VALUES (?, ?, 1, ?, ?)',
+                ((key, STATUS_DONE, now, now) for key in keys)
+            )
+        return len(keys)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,159 @@
+"""Agrupamiento de notas casi duplicadas con SimHash.
+
+La misma nota de agencia aparece en varios medios con cambios mínimos
+(título, firma, un párrafo de más). Cada texto se resume en una huella de
+64 bits; dos notas son casi duplicadas si sus huellas difieren en pocos
+bits. Para no comparar todas contra todas, las huellas se indexan por
+bandas (LSH): la huella se parte en 8 bandas de 8 bits y dos huellas a
+distancia <= 6 comparten al menos dos bandas completas. Se indexa cada par
+de bandas (28 tablas con claves de 16 bits), así que cada búsqueda revisa
+unos pocos candidatos y agrupar n notas cuesta tiempo casi lineal.
+"""
+from datetime import datetime, timezone
+import hashlib
+from itertools import combinations
+import json
+import logging
+import os
+import re
+from radar_keywords import fold_text
+
+FINGERPRINT_BITS = 64
+BANDS = 8
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE_SIZE = 3
+BAND_PAIRS = list(combinations(range(BANDS), 2))
+DEFAULT_MAX_DISTANCE = 6
+MIN_TOKENS = 30  # textos más cortos no tienen huella (colisionarían entre sí)
+
+_WORDS = re.compile(r'\w+')
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def simhash(text):
+    """Huella SimHash de 64 bits de un texto (shingles de 3 palabras), o None
+    si el texto es demasiado corto."""
+    tokens = _WORDS.findall(fold_text(text, fold_accents=True))
+    if len(tokens) < MIN_TOKENS:
+        return None
+    hashes = [
+        _hash64(' '.join(tokens[i:i + SHINGLE_SIZE]))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    ]
+    threshold = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if sum((value >> bit) & 1 for value in hashes) > threshold:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+class NearDuplicateIndex:
+    """Índice LSH de huellas: `find` devuelve el id de una huella a distancia
+    <= `max_distance` (a lo sumo BANDS - 2, para compartir dos bandas)."""
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = [{} for _ in BAND_PAIRS]
+        self.fingerprints = {}
+
+    def _band_keys(self, fingerprint):
+        values = [(fingerprint >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+        return [(values[first] << BAND_BITS) | values[second] for first, second in BAND_PAIRS]
+
+    def find(self, fingerprint):
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for item_id in band.get(key, ()):
+                if hamming_distance(fingerprint, self.fingerprints[item_id]) <= self.max_distance:
+                    return item_id
+        return None
+
+    def add(self, item_id, fingerprint):
+        self.fingerprints[item_id] = fingerprint
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(item_id)
+
+class StreamingClusters:
+    """Agrupamiento incremental: cada resultado se compara al llegar, antes de
+    escribirlo o emitirlo, así lo que sale en vivo es lo mismo que queda en
+    los archivos finales.
+
+    El primer resultado de cada grupo queda como representante y las URLs de
+    los siguientes van a su lista `duplicates`. Si `previous` (índice de
+    corridas anteriores) ya conoce la nota, el resultado es una
+    republicación y se descarta.
+    """
+
+    NEW, DUPLICATE, REPOST = 'new', 'duplicate', 'repost'
+
+    def __init__(self, previous=None, max_distance=DEFAULT_MAX_DISTANCE):
+        self.previous = previous
+        self.index = NearDuplicateIndex(max_distance)
+        self.representatives = []
+        self.reposts = []
+        self.duplicates = 0
+
+    def add(self, result):
+        """Clasifica un resultado; devuelve (NEW | DUPLICATE | REPOST, representante)."""
+        result.setdefault('duplicates', [])
+        fingerprint = result.get('fingerprint')
+        if fingerprint is None:
+            self.representatives.append(result)
+            return self.NEW, result
+        if self.previous is not None and self.previous.find(fingerprint) is not None:
+            self.reposts.append(result)
+            return self.REPOST, None
+        match = self.index.find(fingerprint)
+        if match is None:
+            self.index.add(len(self.representatives), fingerprint)
+            self.representatives.append(result)
+            return self.NEW, result
+        representative = self.representatives[match]
+        representative['duplicates'].append(result['url'])
+        # Con perfiles, la nota agrupada vale para todos los perfiles de sus copias
+        for name, score in result.get('profiles', {}).items():
+            representative['profiles'][name] = max(score, representative['profiles'].get(name, 0))
+        self.duplicates += 1
+        return self.DUPLICATE, representative
+
+def load_fingerprints(path, max_age_seconds, max_distance=DEFAULT_MAX_DISTANCE):
+    """Lee las huellas de corridas anteriores que no vencieron.
+
+    Devuelve (índice, entradas vigentes) para poder volver a guardarlas.
+    """
+    index = NearDuplicateIndex(max_distance)
+    entries = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning("No se pudieron leer las huellas %s: %s", path, e)
+            stored = []
+        now = datetime.now(timezone.utc)
+        for entry in stored:
+            try:
+                seen = datetime.fromisoformat(entry['seen'])
+                fingerprint = int(entry['fingerprint'], 16)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if (now - seen).total_seconds() <= max_age_seconds:
+                index.add(len(entries), fingerprint)
+                entries.append(entry)
+    return index, entries
+
+def save_fingerprints(path, entries, results):
+    """Guarda las huellas vigentes más las de los resultados de esta corrida."""
+    seen = datetime.now(timezone.utc).isoformat()
+    entries = entries + [
+        {"fingerprint": f"{result['fingerprint']:016x}", "url": result['url'], "seen": seen}
+        for result in results if result.get('fingerprint') is not None
+    ]
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
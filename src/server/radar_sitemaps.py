@@ -0,0 +1,100 @@
+"""Lectura incremental de sitemaps (urlset / sitemapindex, con o sin gzip).
+
+SitemapReader recibe el documento por partes a medida que llega de la red,
+lo descomprime si viene en gzip y lo recorre con XMLPullParser, liberando
+cada <url> apenas se procesa. Así nunca se arma el árbol completo ni se
+mantiene el texto entero en memoria para buscarle <loc> con regex.
+"""
+from datetime import date
+import xml.etree.ElementTree as ET
+import zlib
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _namespace(tag):
+    """'{ns}url' -> '{ns}' ('' si el tag no tiene espacio de nombres)."""
+    return tag[:tag.index('}') + 1] if tag.startswith('{') else ''
+
+def parse_sitemap_date(value):
+    """Toma la parte de fecha de un lastmod / publication_date W3C."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+class SitemapEntry:
+    """Una entrada de sitemap: URL de artículo (`url`) o sitemap hijo (`sitemap`)."""
+    __slots__ = ('kind', 'loc', 'date')
+
+    def __init__(self, kind, loc, entry_date):
+        self.kind = kind
+        self.loc = loc
+        self.date = entry_date
+
+class SitemapReader:
+    """Parser incremental de un sitemap. Usar feed() con cada bloque y close()."""
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=('start', 'end'))
+        self.decompressor = None
+        self.started = False
+        self.root = None
+        self.entries = []
+        self.error = None
+
+    def feed(self, chunk):
+        if self.error:
+            return
+        if not self.started:
+            self.started = True
+            if chunk[:2] == GZIP_MAGIC:
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            if self.decompressor:
+                chunk = self.decompressor.decompress(chunk)
+            self.parser.feed(chunk)
+            self._drain()
+        except (ET.ParseError, zlib.error) as e:
+            self.error = e
+
+    def close(self):
+        if self.error:
+            return self.entries
+        try:
+            if self.decompressor:
+                self.parser.feed(self.decompressor.flush())
+            self.parser.close()
+            self._drain()
+        except (ET.ParseError, zlib.error) as e:
+            self.error = e
+        return self.entries
+
+    def _drain(self):
+        for event, element in self.parser.read_events():
+            if event == 'start':
+                if self.root is None:
+                    self.root = element
+                continue
+            name = _local_name(element.tag)
+            if name not in ('url', 'sitemap'):
+                continue
+            # <loc> y <lastmod> son hijos directos en el espacio de nombres
+            # del sitemap; <image:loc> o <video:loc> anidados no cuentan.
+            namespace = _namespace(element.tag)
+            loc = (element.findtext(namespace + 'loc') or '').strip()
+            lastmod = element.findtext(namespace + 'lastmod')
+            published = None
+            for child in element.iter():
+                if _local_name(child.tag) == 'publication_date':
+                    published = child.text
+            if loc:
+                entry_date = parse_sitemap_date(published) or parse_sitemap_date(lastmod)
+                self.entries.append(SitemapEntry(name, loc, entry_date))
+            # Liberar lo ya procesado para que el árbol no crezca
+            if self.root is not None:
+                self.root.clear()
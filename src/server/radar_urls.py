@@ -0,0 +1,79 @@
+"""Utilidades de URLs para radar_optimo.py: clasificación de enlaces a artículos
+y canonicalización para no descargar dos veces la misma nota."""
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Patrones originales de is_article_url
+ARTICLE_PATTERNS = [
+    r'/noticia', r'/article', r'/\d{4}/\d{2}/\d{2}', r'/politica', r'/economia',
+    r'/sociedad', r'/noticias', r'-[0-9]+$', r'\.html$',
+    r'/[a-z0-9-]+/\d+$', r'/[a-z0-9-]+/[a-z0-9-]+$', r'/[a-z0-9-]+$'
+]
+NON_ARTICLE_PATTERNS = [
+    r'/login/', r'\.pdf$', r'/tag/', r'/category/', r'/search/',
+    r'twitter\.com', r'x\.com', r't\.co', r'bitly\.ws', r'facebook\.com',
+    r'instagram\.com', r'youtube\.com', r'whatsapp\.com'
+]
+
+def compile_alternation(patterns):
+    """Une una lista de patrones en una sola expresión compilada."""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+class UrlClassifier:
+    """Decide si una URL parece un artículo con dos expresiones precompiladas.
+
+    Equivale a recorrer las listas de patrones con `re.search` uno por uno,
+    pero cada lista es una sola alternancia: una búsqueda por URL y por lista.
+    `article_patterns` / `non_article_patterns` se suman a los patrones por
+    defecto (se configuran por fuente en sources.json).
+    """
+
+    def __init__(self, article_patterns=(), non_article_patterns=()):
+        self.article_re = compile_alternation(ARTICLE_PATTERNS + list(article_patterns))
+        self.non_article_re = compile_alternation(NON_ARTICLE_PATTERNS + list(non_article_patterns))
+
+    def is_article(self, parsed_url, url):
+        """`parsed_url` es el resultado de urlparse(url)."""
+        return (
+            parsed_url.scheme in ('http', 'https') and
+            self.article_re.search(parsed_url.path) is not None and
+            self.non_article_re.search(url) is None
+        )
+
+# Parámetros que solo identifican la campaña o el referente, no el contenido
+TRACKING_PARAMS = re.compile(
+    r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|igshid|_ga|_gl|ref|ref_src|cmpid|amp)$',
+    re.IGNORECASE
+)
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+def canonicalize_url(url):
+    """URL limpia para descargar: sin fragmento, sin parámetros de seguimiento
+    y sin la variante AMP (`/amp/`, `/amp`, `.amp.html`, `?outputType=amp`)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS.get(scheme, '\0')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parts.path or '/'
+    segments = path.split('/')
+    if 'amp' in segments[1:]:
+        path = '/'.join(segment for segment in segments if segment != 'amp') or '/'
+    if path.endswith('.amp.html'):
+        path = path[:-len('.amp.html')] + '.html'
+    elif path.endswith('.amp'):
+        path = path[:-len('.amp')]
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(name)
+        and not (name.lower() == 'outputtype' and value.lower() == 'amp')
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ''))
+
+def url_key(url):
+    """Clave de deduplicación de una URL ya canonicalizada: http y https son la
+    misma nota y la barra final no cuenta."""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/') or '/'
+    scheme = 'https' if parts.scheme in ('http', 'https') else parts.scheme
+    return urlunsplit((scheme, parts.netloc, path, parts.query, ''))
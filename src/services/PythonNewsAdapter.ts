@@ -331,7 +331,7 @@ export async function executePythonScript(options: NewsSearchOptions): Promise<P
 /**
  * Poll for REAL script execution status
  */
-async function pollRealScriptExecution(pid?: number): Promise<PythonScriptExecutionStatus> {
+async function pollRealScriptExecution(pid?: number | string): Promise<PythonScriptExecutionStatus> {
   return new Promise((resolve, reject) => {
     pythonExecutionStatus.output.push("🔍 Monitoreando progreso del script real...");
     
@@ -349,7 +349,13 @@ async function pollRealScriptExecution(pid?: number): Promise<PythonScriptExecut
         console.log("Real script status:", data);
         
         // Update progress based on real status
-        if (data.status === 'running') {
+        if (data.status === 'queued') {
+          // El daemon todavía está con trabajos anteriores
+          const queuedLine = "⏳ Trabajo en cola, esperando al daemon de radar...";
+          if (!pythonExecutionStatus.output.includes(queuedLine)) {
+            pythonExecutionStatus.output.push(queuedLine);
+          }
+        } else if (data.status === 'running') {
           pythonExecutionStatus.progress = data.progress || Math.min(95, pythonExecutionStatus.progress + 10);
           
           // Add real output if present
@@ -106,7 +106,7 @@ export interface PythonScriptParams {
 // Python script execution API response
 export interface PythonScriptExecutionResponse {
   status: string;
-  pid?: number;
+  pid?: number | string; // "job-N" en modo daemon
   output?: string[];
   error?: string;
   csvPath?: string;